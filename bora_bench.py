@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+import pandas as pd
+
+from bora_classify import final_refine_logic, classify_series, clear_cache
+from bora_db import clean_price_table, compact_price_table, save_fast_db, load_price_table
+from bora_merge import run_merge, find_year_files
+from bora_pricing import quote, quote_batch
+from bora_search import PriceSearchEngine
+from bora_settle import build_settlement, parse_period
+
+# ===========================================================
+# ⏱️ [성능 측정] 가짜 배차 데이터로 주요 구간 시간 재기
+#   python bora_bench.py                 → 10k / 100k / 1M 행 측정 + 지난 기준값과 비교
+#   python bora_bench.py --sizes 10000   → 원하는 크기만
+#   python bora_bench.py --save          → 이번 결과를 기준값(bench_baseline.json)으로 저장
+# ===========================================================
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+BASELINE_NAME = 'bench_baseline.json'
+# 기준값보다 이 배수 이상 느려지면 ❗ 표시
+REGRESSION_RATIO = 1.25
+
+# -----------------------------------------------------------
+# [가짜 데이터 생성] bora_merge.py 가 읽는 연도별 파일과 같은 모양
+# -----------------------------------------------------------
+REGIONS = ["군포 당정동", "안양 평촌", "서울 강남구", "인천 남동공단", "평택 포승", "화성 향남", "수원 권선",
+           "부산 사상", "대전 유성", "광주 하남산단", "용인 기흥", "김포 양촌", "시흥 시화", "안산 반월"]
+CUSTOMERS = ["삼성전자", "LG전자", "현대모비스", "보라상사", "(주)대한", "한빛물산", "DH테크", "세진", "동아", "KCC"]
+# (표기, 가중치) - 실제 접수 메모처럼 톤수/옵션 약어를 섞음
+CAR_NOTES = [
+    ("/다", 12), ("/라", 6), ("/오", 14), ("다마스", 2), ("오토", 2),
+    ("1톤", 10), ("1윙", 3), ("1탑", 3), ("1T 리프트", 2), ("1카", 1),
+    ("1.4윙", 6), ("1.4 탑", 3), ("1.4리프트", 2),
+    ("2.5", 4), ("2.5리프트", 2), ("2.5 윙", 2),
+    ("3.5", 4), ("3.5광폭", 2), ("3.5 무진동", 1), ("3.5윙", 2),
+    ("5톤", 4), ("5톤축", 3), ("5톤 윙", 2), ("5T 광폭", 1),
+    ("11톤 윙", 2), ("16톤", 1), ("25톤 축", 1), ("11톤 무진동 리프트", 1),
+    ("3P", 1), ("12p", 1), ("", 1), ("혼적 1톤", 2), ("합짐 /다", 1), ("왕복", 1),
+]
+BASE_FARES = {"/오": 15_000, "/다": 35_000, "/라": 45_000, "1": 60_000, "2.5": 110_000, "3.5": 140_000,
+              "5": 180_000, "11": 320_000, "16": 380_000, "25": 450_000}
+
+def _fare_for(note, rng):
+    base = 50_000
+    for k, v in BASE_FARES.items():
+        if k in note: base = v; break
+    return int(round(base * rng.uniform(0.6, 1.8), -3))
+
+def make_year_frame(n_rows, year, seed=0):
+    """n_rows 행짜리 연도 파일 내용 (접수일자 / 고객성명 / 도 착 지 / 배달운임 문자열)"""
+    rng = random.Random(seed * 10_000 + year)
+    notes, weights = zip(*CAR_NOTES)
+    start = date(year, 1, 1)
+    rows = []
+    for _ in range(n_rows):
+        note = rng.choices(notes, weights)[0]
+        dest = f"{rng.choice(REGIONS)} {rng.randint(1, 999)}번지 {note}".strip()
+        day = start + timedelta(days=rng.randint(0, 364))
+        rows.append((day.strftime('%Y-%m-%d'), rng.choice(CUSTOMERS), dest, f"{_fare_for(note, rng):,}"))
+    return pd.DataFrame(rows, columns=['접수일자', '고객성명', '도 착 지', '배달운임'])
+
+def write_year_files(folder, n_rows, years=(2023, 2024, 2025), seed=0):
+    # 전체 n_rows 를 연도별 파일로 나눠서 '2023y.xlsx' 형식으로 저장
+    per_year = max(1, n_rows // len(years))
+    for y in years:
+        make_year_frame(per_year, y, seed).to_excel(os.path.join(folder, f"{y}y.xlsx"), index=False)
+    return find_year_files(folder)
+
+# -----------------------------------------------------------
+# [측정]
+# -----------------------------------------------------------
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_size(n_rows, excel=True):
+    """크기 하나에 대해 {구간 이름: 초} 를 돌려줍니다. excel=False 면 엑셀 읽기/쓰기 구간은 건너뜀."""
+    results = {}
+    raw = pd.concat([make_year_frame(n_rows // 3 + 1, y) for y in (2023, 2024, 2025)], ignore_index=True)[:n_rows]
+
+    # 1. 차종 분류: 기존 행별 apply vs 분류 엔진 (캐시 비운 상태 / 캐시 찬 상태)
+    dests = raw['도 착 지']
+    results['classify.apply'] = timed(lambda: dests.apply(final_refine_logic), repeat=1)
+    def cold():
+        clear_cache()
+        classify_series(dests)
+    results['classify.engine_cold'] = timed(cold)
+    results['classify.engine_warm'] = timed(lambda: classify_series(dests))
+
+    merged = raw.copy()
+    merged['차종_최종'] = classify_series(merged['도 착 지'])
+    clean = compact_price_table(clean_price_table(merged), report=False)
+
+    with tempfile.TemporaryDirectory(prefix='bora_bench_') as folder:
+        # 2. 병합 (엑셀 읽기 + 정리 + 분류 + 정렬 + 쓰기)
+        if excel:
+            files = write_year_files(folder, n_rows)
+            results['merge.full'] = timed(lambda: run_merge(folder, files, incremental=False), repeat=1)
+            results['merge.cached'] = timed(lambda: run_merge(folder, files, incremental=True), repeat=1)
+            db_p = os.path.join(folder, '보라물류_최종정밀단가표.xlsx')
+        else:
+            db_p = os.path.join(folder, 'bench_db.xlsx')
+            open(db_p, 'wb').close()
+
+        # 3. 단가 DB 불러오기 (고속 파일 / 엑셀)
+        save_fast_db(clean, db_p)
+        results['db_load.fast'] = timed(lambda: load_price_table(db_p))
+        if excel:
+            def excel_load():
+                os.remove(db_p[:-5] + '.pkl')
+                load_price_table(db_p)
+            results['db_load.excel'] = timed(excel_load, repeat=1)
+
+    # 4. 검색 (이번 달 / 1년 전체 + 차종 / 거래처 타이핑)
+    engine = PriceSearchEngine(clean)
+    results['search.build'] = timed(lambda: PriceSearchEngine(clean), repeat=1)
+    queries = [
+        ('2025-03-01', '2025-03-31', '', '', []),
+        ('2025-01-01', '2025-12-31', '', '', ['1톤', '혼적']),
+        ('2023-01-01', '2025-12-31', '삼성', '', []),
+        ('2023-01-01', '2025-12-31', '', '평택', ['5톤축차']),
+    ]
+    def run_queries():
+        engine.clear_cache()
+        for q in queries: engine.query(*q)
+    results['search.query_x4'] = timed(run_queries, repeat=5)
+
+    # 5. 견적 (1건씩 vs 배열 한 번에)
+    fares = clean['배달운임'].to_numpy()
+    cars = clean['차종_최종'].astype(str).to_numpy()
+    results['pricing.loop'] = timed(lambda: [quote(int(f), True, 25, False, c, 10000, True) for f, c in zip(fares, cars)], repeat=1)
+    results['pricing.batch'] = timed(lambda: quote_batch(fares, True, 25, False, cars, 10000, True))
+
+    # 6. 월말 정산 (1년 전체 거래처, 거래처·월·차종별 합계)
+    results['settle.year'] = timed(lambda: build_settlement(clean, *parse_period('2025')), repeat=1)
+    return results
+
+# -----------------------------------------------------------
+# [결과 표 / 기준값]
+# -----------------------------------------------------------
+def print_table(results, baseline):
+    print(f"\n{'구간':<24}{'행 수':>12}{'시간(ms)':>12}{'기준(ms)':>12}{'비율':>8}")
+    print("-" * 68)
+    regressions = 0
+    for size, cases in results.items():
+        for name, sec in cases.items():
+            base = baseline.get(size, {}).get(name)
+            line = f"{name:<24}{int(size):>12,}{sec * 1000:>12.1f}"
+            if base:
+                ratio = sec / base
+                flag = " ❗" if ratio > REGRESSION_RATIO else ""
+                regressions += bool(flag)
+                line += f"{base * 1000:>12.1f}{ratio:>7.2f}x{flag}"
+            print(line)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="보라물류 성능 측정")
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')], default=DEFAULT_SIZES,
+                        help="측정할 행 수 (쉼표로 구분)")
+    parser.add_argument('--no-excel', action='store_true', help="엑셀 읽기/쓰기 구간 제외 (빠른 확인용)")
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), BASELINE_NAME))
+    parser.add_argument('--save', action='store_true', help="이번 결과를 기준값으로 저장")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    for n in args.sizes:
+        print(f"⏱️ {n:,}행 측정 중...")
+        results[str(n)] = bench_size(n, excel=not args.no_excel)
+
+    regressions = print_table(results, baseline)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+        print(f"\n💾 기준값 저장: {args.baseline}")
+    if regressions:
+        print(f"\n❗ 기준값보다 {REGRESSION_RATIO}배 이상 느려진 구간: {regressions}개")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,85 +4,48 @@ from tkinter import messagebox, ttk
 import tkinter.font as tkfont
 import os
 import sys
+import time
 from datetime import datetime
 from tkcalendar import DateEntry
 import warnings
-import urllib.request # 인터넷 접속용 (업데이트 확인)
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from bora_db import load_price_table, iter_price_parts, concat_parts, day_text, to_day_number, PRICE_COLS
+from bora_search import PriceSearchEngine
+from bora_stats import load_fare_stats
+from bora_watch import DbWatcher, HistoryLoader, db_stamp, row_changes
+from bora_server import connect, SERVER_ENV, StaleVersion, REQUEST_ERRORS
+from bora_pricing import quote, quote_batch, QUOTE_COLS, MOTO_URGENT_FEE, MOTO_RAIN_FEE, MOTO_RACK_FEE
+from bora_receipt import get_receipt_dir, receipt_rows, write_receipt_file, write_receipt_book, write_receipt_folder
+from bora_update import start_update_check # 업데이트 확인은 창을 띄운 뒤 백그라운드에서
+from bora_perf import span, set_log_tag, record, last, status_enabled, maybe_start_profile
 
 # 경고 무시
 warnings.simplefilter(action='ignore', category=UserWarning)
 
-# ===========================================================
-# 🔄 [자동 업데이트 시스템] - 형님의 깃허브와 연동됨
-# ===========================================================
-GITHUB_USER = "DaonMaru"
-REPO_NAME = "BoraSystem"
-BRANCH = "main"
-BASE_URL = f"https://raw.githubusercontent.com/{GITHUB_USER}/{REPO_NAME}/{BRANCH}"
-
-def check_and_update():
-    """
-    서버(깃허브)의 version.txt를 확인하고,
-    내 컴퓨터보다 최신 버전이면 bora_merge.py를 다운로드합니다.
-    """
-    try:
-        # 1. 경로 설정
-        user_profile = os.environ['USERPROFILE']
-        # 원드라이브 우선, 없으면 바탕화면
-        desktop_path = os.path.join(user_profile, 'OneDrive', '바탕 화면')
-        if not os.path.exists(desktop_path):
-            desktop_path = os.path.join(user_profile, 'Desktop')
-        
-        local_ver_file = os.path.join(desktop_path, 'version.txt')
-        target_code_file = os.path.join(desktop_path, 'bora_merge.py')
+# 리스트에 한 번에 그리는 행 수 (스크롤이 끝에 가까워지면 다음 묶음을 이어서 그림)
+TREE_PAGE_SIZE = 200
 
-        # 2. 내 컴퓨터 버전 확인 (없으면 0.0으로 간주)
-        current_ver = 0.0
-        if os.path.exists(local_ver_file):
-            try:
-                with open(local_ver_file, 'r') as f:
-                    current_ver = float(f.read().strip())
-            except:
-                pass # 파일이 깨져있으면 0.0
-
-        # 3. 서버(깃허브) 버전 확인
-        ver_url = f"{BASE_URL}/version.txt"
-        with urllib.request.urlopen(ver_url) as response:
-            server_ver_str = response.read().decode('utf-8').strip()
-            server_ver = float(server_ver_str)
-
-        print(f"📡 버전 확인 - 내PC: {current_ver} / 서버: {server_ver}")
-
-        # 4. 업데이트 진행 (서버 버전이 더 높으면)
-        if server_ver > current_ver:
-            print("🚀 업데이트 발견! 다운로드를 시작합니다...")
-            
-            # (1) bora_merge.py 다운로드
-            code_url = f"{BASE_URL}/bora_merge.py"
-            with urllib.request.urlopen(code_url) as response:
-                code_data = response.read().decode('utf-8')
-                with open(target_code_file, 'w', encoding='utf-8') as f:
-                    f.write(code_data)
-            
-            # (2) 로컬 version.txt 업데이트
-            with open(local_ver_file, 'w') as f:
-                f.write(str(server_ver))
-                
-            return True, server_ver # 업데이트 성공했다는 신호
-
-    except Exception as e:
-        print(f"⚠️ 업데이트 확인 중 오류: {e}")
-        return False, 0.0
-    
-    return False, 0.0 # 업데이트 없음
+# 백그라운드 검색 결과를 확인하는 간격(ms)
+SEARCH_POLL_MS = 30
+
+def format_rows(df):
+    # 리스트에 바로 넣을 수 있는 (날짜, 거래처, 차종, 도착지, 단가) 튜플 목록
+    out = []
+    dates = day_text(df['접수일자'].to_numpy())
+    for d, r in zip(dates, df[['고객성명', '차종_최종', '도 착 지', '배달운임']].itertuples(index=False)):
+        try:
+            fare_val = int(r[3])
+            fare_str = f"{fare_val:,}"
+        except:
+            fare_str = "0"
+        out.append((d, r[0], r[1], r[2], fare_str))
+    return out
 
 # ===========================================================
 # [메인 프로그램 시작]
 # ===========================================================
 
-# 1. 시작하자마자 업데이트 체크
-is_updated, new_ver = check_and_update()
-
 # -----------------------------------------------------------
 # [파일 경로 설정]
 # -----------------------------------------------------------
@@ -102,10 +65,11 @@ def get_db_path():
     # 파일이 없으면 그냥 현재 폴더 경로 리턴 (나중에 생성됨)
     return '보라물류_최종정밀단가표.xlsx'
 
-db_file = get_db_path()
+with span('startup.get_db_path'):
+    db_file = get_db_path()
 
 class BoraUltimateApp:
-    def __init__(self, root):
+    def __init__(self, root, server_url=None):
         self.root = root
         
         # [화면 크기]
@@ -127,45 +91,131 @@ class BoraUltimateApp:
         # -------------------------------------------------------
         # [데이터 로딩]
         # -------------------------------------------------------
-        try:
-            self.df = pd.read_excel(db_file)
-            
-            # 날짜 및 데이터 정리
-            self.df['접수일자'] = pd.to_datetime(self.df['접수일자'], errors='coerce').dt.strftime('%Y-%m-%d')
-            self.df = self.df.dropna(subset=['접수일자'])
-            
-            if '배달운임' in self.df.columns:
-                self.df['배달운임'] = (
-                    self.df['배달운임'].astype(str)
-                    .str.replace(',', '')
-                    .str.extract(r'(\d+)', expand=False)
-                    .fillna(0).astype(int)
-                )
-            
-            self.df = self.df[(self.df['차종_최종'] != "미분류") & (~self.df['차종_최종'].str.contains('P', na=False))]
-            
-            title_txt = f"보라물류 통합 시스템 V{new_ver if is_updated else '1.0'}"
-            if is_updated: title_txt += " (✨업데이트 완료!)"
-            self.root.title(title_txt)
-            
-        except Exception as e:
-            # 파일이 없거나 오류나면 빈 껍데기 실행
-            self.df = pd.DataFrame(columns=['접수일자', '고객성명', '차종_최종', '도 착 지', '배달운임'])
-            self.root.title("보라물류 통합 시스템 (데이터 없음)")
-
-        # 업데이트 알림 메시지
-        if is_updated:
-            messagebox.showinfo("업데이트 성공", f"서버에서 최신 통합 엔진(v{new_ver})을 받아왔습니다!\n이제 최신 로직으로 작동합니다.")
+        self.server_url = None
+        # 이 날짜(일수)보다 이전 기록은 아직 불러오는 중 (None = 전부 불러옴)
+        self.pending_before = None
+        if server_url:
+            # 공유 서버 모드: 단가표는 서버 메모리에만 있고 여기서는 검색/통계만 요청
+            try:
+                with span('startup.connect'):
+                    self.engine, self.fare_stats = connect(server_url)
+                self.server_url, self.db_source = server_url, self.engine.source
+                self.root.title(f"보라물류 통합 시스템 V1.0 (서버: {self.engine.client.base_url})")
+            except Exception as e:
+                print(f"⚠️ 서버 연결 실패 - 이 PC 에서 직접 불러옵니다: {e}")
+        if self.server_url is None:
+            self.start_local_data()
+
+        # 리스트에 그려진 결과를 만든 엔진 (리스트 iid = 이 엔진의 행 번호)
+        self.view = self.engine
 
         self.search_timer = None
+        self.result_rows = [] # 현재 검색 결과 (self.view 행 번호)
+        self.result_version = None # 서버 모드: 그 행 번호를 만든 서버 단가표 버전
+        self.result_values = [] # 첫 묶음을 리스트 표시용 글자로 바꿔 둔 것 (나머지는 스크롤할 때)
+        self.shown_count = 0  # 그 중 리스트에 실제로 그려진 개수
+
+        # 검색은 작업 스레드 1개에서 실행 → 타이핑 중에도 화면이 멈추지 않음
+        # 검색마다 번호(search_gen)를 붙여서, 더 새로운 검색이 들어오면 이전 결과는 버림
+        self.search_gen = 0
+        self.search_worker = ThreadPoolExecutor(max_workers=1)
+        self.search_results = queue.Queue()
+        self.search_polling = False
+
+        self.build_ui(root)
+
+        self.search() 
+        self.ent_cust.focus_set()
+
+        # 창이 뜬 다음 업데이트 확인 (네트워크가 느려도 화면은 바로 사용 가능)
+        start_update_check(self.root, self.on_update_checked)
+
+        # 단가표는 창이 뜬 뒤 최근 몇 달 → 이전 연도 순으로 뒤에서 불러옴
+        # (다 불러온 다음 병합으로 단가표가 다시 만들어지면 재시작 없이 새 데이터로 교체, 서버 모드는 서버가 감시)
+        if self.server_url is None:
+            self.history_loader = HistoryLoader(self.root, iter_price_parts(db_file), self._load_history_part,
+                                                self.on_history_part, self._finish_history, self.on_history_done).start()
+
+    def start_local_data(self):
+        # 빈 엔진으로 창부터 띄움 → 조각이 올 때마다 엔진을 넓혀서 교체
+        self.startup_started = time.perf_counter()
+        self.loading_stamp = db_stamp(db_file) # 불러오는 도중 병합이 끝나도 놓치지 않게
+        self.engine = PriceSearchEngine(pd.DataFrame(columns=PRICE_COLS))
+        self.history_engine = self.engine # 작업 스레드가 조각을 붙여 가는 엔진
+        self.db_source = None
+        self.pending_before = float('inf')
+        self.root.title("보라물류 통합 시스템 V1.0 (⏳ 단가표 불러오는 중)")
+
+        # 과거 운임 통계는 병합 때 만들어 둔 파일을 바로 사용 (없으면 다 불러온 뒤 계산)
+        with span('startup.fare_stats') as sp:
+            self.fare_stats, sp['source'] = load_fare_stats(db_file)
+        self.fare_stats_source = sp['source']
+
+    def _load_history_part(self, item):
+        # [작업 스레드] 지금까지 불러온 데이터 + 한 조각 더 → 새 엔진
+        # 조각은 지금까지보다 오래된 날짜뿐이라 최신순 정렬에서 뒤에 붙음 → 기존 행 번호는 그대로
+        start_day, part, source = item
+        old = self.history_engine
+        with span('startup.history_index', rows=len(old) + len(part)):
+            engine = PriceSearchEngine(concat_parts([old.df, part]), previous=old)
+        self.history_engine = engine
+        return engine, start_day, source
+
+    def _finish_history(self):
+        # [작업 스레드] 통계 파일이 없었으면 전체를 다 불러온 지금 계산
+        if self.fare_stats_source == 'file' or len(self.history_engine) == 0: return None
+        return load_fare_stats(db_file, self.history_engine.df)
+
+    def on_history_part(self, result):
+        # [메인 스레드] 넓어진 엔진으로 교체. 지금 검색 기간이 방금 들어온 구간에 걸치면 결과를 넓혀서 다시
+        engine, start_day, source = result
+        first = self.db_source is None
+        self.engine, self.db_source = engine, source
+        waited, self.pending_before = self.pending_before, start_day
+        if first:
+            self.root.title("보라물류 통합 시스템 V1.0")
+            record('startup.first_rows', (time.perf_counter() - self.startup_started) * 1000, rows=len(engine))
+        if set(engine.car_types()) - self.shown_types:
+            self.build_type_checks()
+        if self.search_start_day() < waited:
+            self.search()
+
+    def on_history_done(self, result, error):
+        waited, self.pending_before = self.pending_before, None
+        if error is not None:
+            print(f"⚠️ 단가표 불러오기 실패: {error}")
+            if self.db_source is None:
+                # 파일이 없거나 오류나면 빈 껍데기 실행
+                self.root.title("보라물류 통합 시스템 (데이터 없음)")
+        if result is not None:
+            self.fare_stats, self.fare_stats_source = result
+        if waited is not None and self.search_start_day() < waited:
+            self.search() # "불러오는 중" 표시 지우기
+        # 엑셀에서 읽었으면 고속 파일(.pkl)은 방금 우리가 다시 만든 것 → 엑셀이 그대로면 지금 상태를 기준으로
+        stamp = self.loading_stamp
+        if self.db_source == 'excel':
+            current = db_stamp(db_file)
+            if current[0] == stamp[0]: stamp = current
+        self.db_watcher = DbWatcher(self.root, db_file, self._reload_data, self.on_db_reloaded).start(stamp)
+
+    def build_ui(self, root):
 
         # ========================================================
         # [UI 구성]
         # ========================================================
+        ui_started = time.perf_counter()
         btn_frame = tk.Frame(root, pady=10, bg="#eee")
         btn_frame.pack(side="bottom", fill="x")
+
+        # BORA_PERF_STATUS=1 이면 맨 아래에 구간 시간 표시줄
+        self.lbl_perf = None
+        if status_enabled():
+            self.lbl_perf = tk.Label(root, anchor="w", fg="#888", font=("Malgun Gothic", 9))
+            self.lbl_perf.pack(side="bottom", fill="x", padx=20)
         tk.Button(btn_frame, text="선택 항목 정산 및 영수증 발행 (팝업)", command=self.open_option_popup, 
-                  bg="#6c5ce7", fg="white", font=self.font_btn, height=2).pack(fill="x", padx=20, pady=5)
+                  bg="#6c5ce7", fg="white", font=self.font_btn, height=2).pack(side="left", fill="x", expand=True, padx=(20, 5), pady=5)
+        tk.Button(btn_frame, text="선택 항목 일괄 영수증 (Ctrl/Shift 다중선택)", command=self.open_bulk_receipt_popup, 
+                  bg="#27ae60", fg="white", font=self.font_btn, height=2).pack(side="left", fill="x", expand=True, padx=(5, 20), pady=5)
 
         header = tk.Frame(root, pady=10)
         header.pack(side="top", fill="x")
@@ -199,12 +249,48 @@ class BoraUltimateApp:
         self.ent_dest.bind('<KeyRelease>', lambda e: self.smart_search())
         
         tk.Button(sf, text="조회", command=self.search, bg="#6c5ce7", fg="white", width=8, font=self.font_bold).grid(row=0, column=8, padx=15)
+        self.lbl_count = tk.Label(sf, text="", font=self.font_bold, fg="#4834d4")
+        self.lbl_count.grid(row=0, column=9, padx=5)
+
+        # 차종 필터 (단가표 조각이 들어오면서 새 차종이 보이면 다시 그림)
+        self.type_frame = tk.LabelFrame(root, text="차종 분류 선택", font=self.font_bold)
+        self.type_frame.pack(side="top", pady=5, padx=20, fill="x")
+        self.check_vars = {}
+        self.build_type_checks()
 
-        # 차종 필터
-        type_frame = tk.LabelFrame(root, text="차종 분류 선택", font=self.font_bold)
-        type_frame.pack(side="top", pady=5, padx=20, fill="x")
+        # 트리뷰(리스트)
+        list_frame = tk.Frame(root)
+        list_frame.pack(side="top", pady=5, padx=20, fill="both", expand=True)
+        scrollbar_y = ttk.Scrollbar(list_frame, orient="vertical")
+        scrollbar_x = ttk.Scrollbar(list_frame, orient="horizontal")
+
+        style = ttk.Style()
+        style.configure("Treeview", rowheight=30, font=("Malgun Gothic", 10))
+        style.configure("Treeview.Heading", font=("Malgun Gothic", 10, "bold"))
         
+        self.scrollbar_y = scrollbar_y
+        self.tree = ttk.Treeview(list_frame, columns=("날짜", "거래처", "차종", "도착지", "단가"), show="headings", selectmode="extended",
+                                 yscrollcommand=self.on_tree_scroll, xscrollcommand=scrollbar_x.set)
+        
+        scrollbar_y.config(command=self.tree.yview)
+        scrollbar_x.config(command=self.tree.xview)
+        scrollbar_y.pack(side="right", fill="y")
+        scrollbar_x.pack(side="bottom", fill="x")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.heading("날짜", text="날짜"); self.tree.heading("거래처", text="거래처명")
+        self.tree.heading("차종", text="차종/옵션"); self.tree.heading("도착지", text="도착지 상세"); self.tree.heading("단가", text="기존단가")
+        self.tree.column("날짜", width=100, anchor="center"); self.tree.column("거래처", width=160)
+        self.tree.column("차종", width=180, anchor="center"); self.tree.column("도착지", width=500); self.tree.column("단가", width=110, anchor="e")
+        self.tree.bind("<Double-1>", lambda e: self.open_option_popup())
+        record('startup.ui', (time.perf_counter() - ui_started) * 1000)
+
+    def build_type_checks(self):
+        # 이미 체크한 차종은 다시 그려도 체크 유지
+        checked = {name: var.get() for name, var in self.check_vars.items()}
+        for child in self.type_frame.winfo_children(): child.destroy()
         self.check_vars = {}
+        self.shown_types = set(self.engine.car_types())
         groups = {
             "🚀 퀵서비스": ["오토바이", "다마스", "라보"],
             "📦 혼적/합짐": ["혼적", "합짐"], 
@@ -212,16 +298,13 @@ class BoraUltimateApp:
             "🚛 대형운송": ["2.5톤", "3.5톤", "5톤", "11톤", "16톤", "18톤", "25톤"]
         }
         
-        if not self.df.empty:
-            raw_types = self.df['차종_최종'].unique().tolist()
-        else:
-            raw_types = []
+        raw_types = self.engine.car_types()
 
         for force_item in ["혼적", "합짐"]:
             if force_item not in raw_types: raw_types.append(force_item)
             
         for g_name, keywords in groups.items():
-            g_main_f = tk.Frame(type_frame, pady=2)
+            g_main_f = tk.Frame(self.type_frame, pady=2)
             g_main_f.pack(fill="x", padx=10)
             lbl_color = "#d63031" if "혼적" in g_name else "#4834d4"
             tk.Label(g_main_f, text=g_name, font=self.font_bold, width=15, anchor="w", fg=lbl_color).pack(side="left", anchor="nw")
@@ -239,80 +322,169 @@ class BoraUltimateApp:
                 return 99
 
             for i, t_name in enumerate(sorted(matched_types, key=sort_key)):
-                var = tk.BooleanVar()
+                var = tk.BooleanVar(value=checked.get(t_name, False))
                 cb = tk.Checkbutton(cb_container, text=t_name, variable=var, command=self.search, font=self.font_default)
                 cb.grid(row=i//5, column=i%5, padx=5, pady=0, sticky="w")
                 self.check_vars[t_name] = var
 
-        # 트리뷰(리스트)
-        list_frame = tk.Frame(root)
-        list_frame.pack(side="top", pady=5, padx=20, fill="both", expand=True)
-        scrollbar_y = ttk.Scrollbar(list_frame, orient="vertical")
-        scrollbar_x = ttk.Scrollbar(list_frame, orient="horizontal")
-
-        style = ttk.Style()
-        style.configure("Treeview", rowheight=30, font=("Malgun Gothic", 10))
-        style.configure("Treeview.Heading", font=("Malgun Gothic", 10, "bold"))
-        
-        self.tree = ttk.Treeview(list_frame, columns=("날짜", "거래처", "차종", "도착지", "단가"), show="headings", 
-                                 yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
-        
-        scrollbar_y.config(command=self.tree.yview)
-        scrollbar_x.config(command=self.tree.xview)
-        scrollbar_y.pack(side="right", fill="y")
-        scrollbar_x.pack(side="bottom", fill="x")
-        self.tree.pack(side="left", fill="both", expand=True)
-
-        self.tree.heading("날짜", text="날짜"); self.tree.heading("거래처", text="거래처명")
-        self.tree.heading("차종", text="차종/옵션"); self.tree.heading("도착지", text="도착지 상세"); self.tree.heading("단가", text="기존단가")
-        self.tree.column("날짜", width=100, anchor="center"); self.tree.column("거래처", width=160)
-        self.tree.column("차종", width=180, anchor="center"); self.tree.column("도착지", width=500); self.tree.column("단가", width=110, anchor="e")
-        self.tree.bind("<Double-1>", lambda e: self.open_option_popup())
-
-        self.search() 
-        self.ent_cust.focus_set()
+    def on_update_checked(self, is_updated, new_ver):
+        if not is_updated: return
+        # 데이터 없음 상태면 제목은 그대로 두고 알림만
+        if self.db_source is not None:
+            self.root.title(f"보라물류 통합 시스템 V{new_ver} (✨업데이트 완료!)")
+        messagebox.showinfo("업데이트 성공", f"서버에서 최신 통합 엔진(v{new_ver})을 받아왔습니다!\n이제 최신 로직으로 작동합니다.")
+
+    def _reload_data(self):
+        # [감시 스레드] 새 단가표 + 인덱스 + 통계를 미리 다 만들어 둠 (화면은 그대로 사용 가능)
+        with span('reload.load_db') as sp:
+            df, source = load_price_table(db_file, compact=True)
+            sp['source'], sp['rows'] = source, len(df)
+        old = self.engine
+        added, removed = row_changes(old.df, df)
+        if not added and not removed: return None # 다시 썼지만 내용은 같음
+        with span('reload.index', rows=len(df), added=added, removed=removed):
+            engine = PriceSearchEngine(df, previous=old) # 글자 색인은 새 값만 추가
+        fare_stats, _ = load_fare_stats(db_file, engine.df)
+        return engine, fare_stats, source, added, removed
+
+    def on_db_reloaded(self, result):
+        # [메인 스레드] 준비된 것들을 한 번에 교체하고 현재 검색을 다시 실행
+        engine, fare_stats, source, added, removed = result
+        self.engine, self.fare_stats, self.db_source = engine, fare_stats, source
+        if set(engine.car_types()) - self.shown_types:
+            self.build_type_checks()
+        self.root.title(f"보라물류 통합 시스템 V1.0 (🔄 {datetime.now().strftime('%H:%M')} 단가표 갱신: +{added:,} / -{removed:,}건)")
+        print(f"🔄 단가표 갱신: 새 행 {added:,}건 / 없어진 행 {removed:,}건")
+        self.search()
 
     def smart_search(self):
         if self.search_timer is not None:
             self.root.after_cancel(self.search_timer)
         self.search_timer = self.root.after(300, self.search)
 
+    def search_start_day(self):
+        return to_day_number(self.ent_start.get_date())
+
     def search(self):
-        for i in self.tree.get_children(): self.tree.delete(i)
-        
         c = self.ent_cust.get().strip().upper()
         d = self.ent_dest.get().strip().upper()
         s_date = self.ent_start.get_date().strftime("%Y-%m-%d")
         e_date = self.ent_end.get_date().strftime("%Y-%m-%d")
+        selected_types = [n for n, v in self.check_vars.items() if v.get()]
 
-        temp = self.df.copy()
-        if temp.empty: return
+        self.search_gen += 1
+        self.lbl_count.config(text="⏳ 검색 중...")
+        self.search_worker.submit(self._run_search, self.search_gen, self.engine, (s_date, e_date, c, d, selected_types))
+        if not self.search_polling:
+            self.search_polling = True
+            self.root.after(SEARCH_POLL_MS, self._poll_search)
 
-        if s_date and e_date:
-            temp = temp[(temp['접수일자'] >= s_date) & (temp['접수일자'] <= e_date)]
+    def _run_search(self, gen, engine, params):
+        # [작업 스레드] Tk 위젯은 건드리지 않고 결과만 큐에 넣음
+        if gen != self.search_gen: return # 그새 새 검색이 들어왔으면 건너뜀
+        try:
+            with span('search.filter') as sp:
+                if self.server_url is None:
+                    version, rows = None, engine.query(*params)
+                else:
+                    version, rows = engine.query(*params) # 서버는 (단가표 버전, 행 번호)
+                sp['rows'] = len(rows)
+            if gen != self.search_gen: return
+            with span('search.format', rows=min(len(rows), TREE_PAGE_SIZE)):
+                values = format_rows(self.engine_rows(engine, rows[:TREE_PAGE_SIZE], version))
+            self.search_results.put((gen, engine, (version, rows), values))
+        except Exception as e:
+            self.search_results.put((gen, engine, e, None))
 
-        if c: temp = temp[temp['고객성명'].str.contains(c, na=False)]
-        if d == "혼적":
-            temp = temp[temp['도 착 지'].str.contains("혼적", na=False) | temp['차종_최종'].str.contains("혼적", na=False)]
-        elif d: 
-            temp = temp[temp['도 착 지'].str.contains(d, na=False)]
-        
-        selected_types = [n for n, v in self.check_vars.items() if v.get()]
-        if selected_types:
-            condition = temp['차종_최종'].isin(selected_types)
-            if "혼적" in selected_types or "합짐" in selected_types:
-                mixed_cond = temp['도 착 지'].str.contains("혼적|합짐", na=False) | temp['차종_최종'].str.contains("혼적|합짐", na=False)
-                temp = temp[condition | mixed_cond]
-            else:
-                temp = temp[condition]
-
-        for _, r in temp.iterrows():
-            try:
-                fare_val = int(r['배달운임'])
-                fare_str = f"{fare_val:,}"
-            except:
-                fare_str = "0"
-            self.tree.insert("", "end", values=(r['접수일자'], r['고객성명'], r['차종_최종'], r['도 착 지'], fare_str))
+    def _poll_search(self):
+        latest = None
+        while True:
+            try: latest = self.search_results.get_nowait()
+            except queue.Empty: break
+
+        if latest is None or latest[0] != self.search_gen:
+            # 최신 검색이 아직 진행 중
+            self.root.after(SEARCH_POLL_MS, self._poll_search)
+            return
+        self.search_polling = False
+
+        gen, engine, result, values = latest
+        if engine is not self.engine:
+            self.search() # 검색 도중 데이터가 바뀌었으면 새 데이터로 다시
+            return
+        if isinstance(result, Exception):
+            self.lbl_count.config(text=f"⚠️ 검색 오류: {result}")
+            return
+        self.show_results(result, values)
+
+    def engine_rows(self, engine, positions, version):
+        # 행 번호 → 원래 행. 서버 모드는 그 행 번호를 만든 단가표 버전으로 요청
+        if version is None: return engine.rows(positions)
+        return engine.rows(positions, version)
+
+    def view_rows(self, positions):
+        # 리스트에 그려진 결과의 행 (서버가 그새 갱신됐으면 StaleVersion)
+        return self.engine_rows(self.view, positions, self.result_version)
+
+    def on_stale_version(self):
+        # 서버가 단가표를 다시 불러와서 리스트의 행 번호가 더 이상 맞지 않음 → 알리고 다시 검색
+        self.result_rows = self.result_rows[:self.shown_count] # 예전 결과를 더 그리지 않게
+        messagebox.showinfo("단가표 갱신", "서버의 단가표가 갱신되었습니다.\n새 단가표로 다시 검색합니다.")
+        self.search()
+
+    def on_server_error(self, e):
+        # 서버 요청 실패 (연결 끊김 / 시간 초과) → 알리기만 하고 창은 띄우지 않음
+        self.result_rows = self.result_rows[:self.shown_count] # 스크롤할 때마다 다시 요청하지 않게
+        messagebox.showerror("서버 오류", f"공유 서버에 요청하지 못했습니다.\n잠시 뒤 다시 검색해 주세요.\n({e})")
+
+    def show_results(self, result, values):
+        # 리스트 행 번호는 이 결과를 만든 엔진(과 서버 버전) 기준 → 리스트를 다시 그릴 때 같이 교체
+        self.view = self.engine
+        self.result_version, rows = result
+        if set(self.engine.car_types()) - self.shown_types:
+            self.build_type_checks() # 서버에 새 차종이 생김
+        self.tree.delete(*self.tree.get_children())
+        self.result_rows, self.result_values, self.shown_count = rows, values, 0
+        text = f"조회 결과: {len(rows):,}건"
+        if self.pending_before is not None and self.search_start_day() < self.pending_before:
+            text += " (⏳ 이전 기록 불러오는 중...)" # 해당 기록이 들어오면 자동으로 다시 검색
+        self.lbl_count.config(text=text)
+        self.tree.yview_moveto(0)
+        with span('search.tree_fill', rows=min(len(rows), TREE_PAGE_SIZE)):
+            self.show_more_rows()
+        self.update_perf_status()
+
+    def update_perf_status(self):
+        if self.lbl_perf is None: return
+        parts = []
+        for name in ('startup.first_rows', 'search.filter', 'search.format', 'search.tree_fill'):
+            hit = last(name)
+            if hit: parts.append(f"{name} {hit[0]:.0f}ms")
+        self.lbl_perf.config(text="  |  ".join(parts))
+
+    def show_more_rows(self):
+        # 다음 묶음만 Treeview 에 추가 (iid = self.view 행 번호 → 선택 시 원래 행을 바로 찾음)
+        start = self.shown_count
+        page = self.result_rows[start:start + TREE_PAGE_SIZE]
+        if len(page) == 0: return
+        # 첫 묶음은 검색 스레드에서 미리 만들어 둠, 이후 묶음은 스크롤할 때 그 묶음만
+        try:
+            values_list = self.result_values if start == 0 else format_rows(self.view_rows(page))
+        except StaleVersion:
+            self.on_stale_version()
+            return
+        except REQUEST_ERRORS as e:
+            self.on_server_error(e)
+            return
+        for pos, values in zip(page, values_list):
+            self.tree.insert("", "end", iid=str(pos), values=values)
+        self.shown_count = start + len(page)
+
+    def on_tree_scroll(self, first, last):
+        self.scrollbar_y.set(first, last)
+        # 스크롤이 끝에 가까우면 다음 묶음을 미리 그려 둠
+        if float(last) > 0.9 and self.shown_count < len(self.result_rows):
+            self.root.after_idle(self.show_more_rows)
 
     def open_option_popup(self):
         sel = self.tree.selection()
@@ -320,8 +492,20 @@ class BoraUltimateApp:
             messagebox.showwarning("경고", "먼저 목록에서 항목을 선택해주세요.")
             return
         
-        item = self.tree.item(sel[0])['values']
-        try: base_fare = int(str(item[4]).replace(",", ""))
+        # 리스트의 iid 는 self.view 의 행 번호 → 화면 글자가 아니라 원래 행에서 값을 가져옴
+        # 서버 모드는 둘 다 요청이므로 창을 만들기 전에 받아 둠 (실패하면 빈 창이 남지 않게)
+        try:
+            r = self.view_rows([int(sel[0])]).iloc[0]
+            # 같은 거래처 / 도착지 / 차종의 과거 운임 범위
+            st = self.fare_stats.lookup(r['고객성명'], r['도 착 지'], r['차종_최종'])
+        except StaleVersion:
+            self.on_stale_version()
+            return
+        except REQUEST_ERRORS as e:
+            self.on_server_error(e)
+            return
+        item = [day_text([r['접수일자']])[0], r['고객성명'], r['차종_최종'], r['도 착 지'], r['배달운임']]
+        try: base_fare = int(item[4])
         except: base_fare = 0
             
         car_type, cust_name, dest_name = str(item[2]), str(item[1]), str(item[3])
@@ -340,6 +524,11 @@ class BoraUltimateApp:
         tk.Label(info_frame, text=f"차종: {car_type}   |   도착지: {item[3]}", font=("Malgun Gothic", 12)).pack(anchor="w")
         tk.Label(info_frame, text=f"기본 운임: {base_fare:,}원", font=("Malgun Gothic", 14, "bold"), fg="#4834d4").pack(anchor="w", pady=5)
 
+        if st:
+            stat_text = (f"📊 과거 {st['건수']:,}건  |  최저 {st['최저']:,} / 중간 {st['중간']:,} / 최고 {st['최고']:,}원"
+                         f"  |  최근 {st['최근운임']:,}원 ({st['최근일자']})")
+            tk.Label(info_frame, text=stat_text, font=("Malgun Gothic", 10), fg="#636e72").pack(anchor="w")
+
         opt_frame = tk.LabelFrame(pop, text="추가 옵션 설정", font=self.font_bold, padx=10, pady=10)
         opt_frame.pack(fill="x", padx=10, pady=5)
 
@@ -359,9 +548,9 @@ class BoraUltimateApp:
         moto_frame.grid(row=2, column=0, columnspan=3, sticky="we", pady=10)
         
         tk.Radiobutton(moto_frame, text="일반", variable=v_urgent, value=0).pack(side="left", padx=5)
-        tk.Radiobutton(moto_frame, text="긴급(+1만)", variable=v_urgent, value=10000, fg="orange").pack(side="left", padx=5)
-        tk.Radiobutton(moto_frame, text="우천(+2만)", variable=v_urgent, value=20000, fg="red").pack(side="left", padx=5)
-        tk.Checkbutton(moto_frame, text="짐받이(+5천)", variable=v_rack, onvalue=5000, offvalue=0).pack(side="left", padx=10)
+        tk.Radiobutton(moto_frame, text="긴급(+1만)", variable=v_urgent, value=MOTO_URGENT_FEE, fg="orange").pack(side="left", padx=5)
+        tk.Radiobutton(moto_frame, text="우천(+2만)", variable=v_urgent, value=MOTO_RAIN_FEE, fg="red").pack(side="left", padx=5)
+        tk.Checkbutton(moto_frame, text="짐받이(+5천)", variable=v_rack, onvalue=MOTO_RACK_FEE, offvalue=0).pack(side="left", padx=10)
 
         if "오토바이" not in car_type:
             for child in moto_frame.winfo_children(): child.configure(state='disabled')
@@ -373,74 +562,26 @@ class BoraUltimateApp:
 
         def create_receipt_excel(data_dict):
             try:
-                receipt_data = [
-                    ["보라물류 운송 영수증(견적서)", ""], ["", ""], ["", ""],
-                    ["[ 공급자 정보 ]", ""], ["등록번호", "123-86-13156"], ["상    호", "보라물류"], ["대 표 자", "백병순"],
-                    ["주    소", "경기도 군포시 당정동 103-3 1층"], ["업    태", "운수"], ["종    목", "퀵서비스, 운송주선, 화물운송"],
-                    ["", ""],
-                    ["[ 운송 내역 ]", ""], ["일    자", datetime.now().strftime("%Y-%m-%d")],
-                    ["공급받는자", cust_name], ["운행구간", dest_name], ["차    종", car_type],
-                    ["", ""],
-                    ["[ 금액 산출 내역 ]", ""], ["항    목", "금    액"], ["--------------------", "--------------------"],
-                    ["기본 운임", f"{data_dict['기본운임']:,}"],
-                ]
-                
-                if data_dict['왕복할증'] > 0: receipt_data.append(["왕복 할증", f"{data_dict['왕복할증']:,}"])
-                if data_dict['대기료'] > 0: receipt_data.append(["대기료", f"{data_dict['대기료']:,}"])
-                if data_dict['휴일할증'] > 0: receipt_data.append(["휴일/야간 할증", f"{data_dict['휴일할증']:,}"])
-                if data_dict['기타할증'] > 0: receipt_data.append(["오토바이/기타 할증", f"{data_dict['기타할증']:,}"])
-                
-                receipt_data.extend([["", ""], ["공급가액", f"{data_dict['공급가액']:,}"], ["부 가 세", f"{data_dict['부가세']:,}"], ["", ""], ["총 합 계", f"{data_dict['최종청구금액']:,}"], ["", ""], ["위 금액을 정히 영수(청구)합니다.", ""], ["보라물류 (인)", ""]])
-
-                df_receipt = pd.DataFrame(receipt_data, columns=["항목", "내용"])
-                user_profile = os.environ['USERPROFILE']
-                save_dir = os.path.join(user_profile, 'Desktop')
-                if not os.path.exists(save_dir): save_dir = os.path.join(user_profile, '바탕 화면')
-                
+                save_dir = get_receipt_dir()
                 filename = f"{datetime.now().strftime('%Y%m%d_%H%M')}_{cust_name.replace('/', '')}_영수증.xlsx"
-                save_path = os.path.join(save_dir, filename)
-                df_receipt.to_excel(save_path, index=False, header=False)
+                write_receipt_file(os.path.join(save_dir, filename), receipt_rows(cust_name, dest_name, car_type, data_dict))
                 messagebox.showinfo("발행 완료", f"영수증이 저장되었습니다!\n위치: {save_dir}")
             except Exception as e: messagebox.showerror("실패", f"영수증 생성 오류: {e}")
 
         def calc_final():
-            current_fare = base_fare
-            data_row = {"기본운임": base_fare, "왕복할증": 0, "대기료": 0, "휴일할증": 0, "기타할증": 0, "공급가액": 0, "부가세": 0, "최종청구금액": 0}
-            detail_text = f"■ 기본 운임: {base_fare:,}원\n" + "-" * 40 + "\n"
-
-            if v_round.get():
-                added = int(current_fare * 0.7)
-                current_fare += added; data_row["왕복할증"] = added
-                detail_text += f"+ [왕복 할증] 70% 추가: {added:,}원\n"
-            
             try: mins = int(v_wait_min.get())
             except: mins = 0
-            if mins > 0:
-                wait_cost = (mins // 10) * 1000
-                current_fare += wait_cost; data_row["대기료"] = wait_cost
-                detail_text += f"+ [대기료] {mins}분: {wait_cost:,}원\n"
-
-            if v_sun.get():
-                current_fare += 10000; data_row["휴일할증"] = 10000
-                detail_text += f"+ [휴일/야간] 할증: 10,000원\n"
-
-            if "오토바이" in car_type:
-                total_moto_add = v_urgent.get() + v_rack.get()
-                if total_moto_add > 0:
-                    current_fare += total_moto_add; data_row["기타할증"] = total_moto_add
-                    detail_text += f"+ [오토바이] 옵션: {total_moto_add:,}원\n"
-
-            supply_price = int(current_fare); data_row["공급가액"] = supply_price
-            detail_text += "-" * 40 + "\n" + f"▶ 공급가액: {supply_price:,}원\n"
-            
-            final_total = supply_price
-            if v_tax.get():
-                vat = int(supply_price * 0.1)
-                final_total += vat; data_row["부가세"] = vat
-                detail_text += f"▶ 부가세(10%): {vat:,}원\n"
-            
-            data_row["최종청구금액"] = final_total
-            detail_text += "=" * 40 + "\n" + f"💰 최종 청구 금액: {final_total:,}원"
+            data_row = quote(base_fare, round_trip=v_round.get(), wait_min=mins, holiday=v_sun.get(), car_type=car_type,
+                             moto_urgent=v_urgent.get(), moto_rack=v_rack.get() > 0, with_vat=v_tax.get())
+
+            detail_text = f"■ 기본 운임: {base_fare:,}원\n" + "-" * 40 + "\n"
+            if v_round.get(): detail_text += f"+ [왕복 할증] 70% 추가: {data_row['왕복할증']:,}원\n"
+            if mins > 0: detail_text += f"+ [대기료] {mins}분: {data_row['대기료']:,}원\n"
+            if v_sun.get(): detail_text += f"+ [휴일/야간] 할증: {data_row['휴일할증']:,}원\n"
+            if data_row["기타할증"] > 0: detail_text += f"+ [오토바이] 옵션: {data_row['기타할증']:,}원\n"
+            detail_text += "-" * 40 + "\n" + f"▶ 공급가액: {data_row['공급가액']:,}원\n"
+            if v_tax.get(): detail_text += f"▶ 부가세(10%): {data_row['부가세']:,}원\n"
+            detail_text += "=" * 40 + "\n" + f"💰 최종 청구 금액: {data_row['최종청구금액']:,}원"
 
             lbl_detail.config(text=detail_text, fg="#2d3436")
             btn_receipt.config(state="normal", command=lambda: create_receipt_excel(data_row))
@@ -451,5 +592,85 @@ class BoraUltimateApp:
         btn_receipt.pack(side="right", padx=20, expand=True)
         pop.bind('<Return>', lambda e: calc_final())
 
+    def open_bulk_receipt_popup(self):
+        sel = self.tree.selection()
+        if not sel:
+            messagebox.showwarning("경고", "먼저 목록에서 항목을 선택해주세요. (Ctrl/Shift 로 여러 건 선택)")
+            return
+        try:
+            rows = self.view_rows([int(i) for i in sel])
+        except StaleVersion:
+            self.on_stale_version()
+            return
+        except REQUEST_ERRORS as e:
+            self.on_server_error(e)
+            return
+
+        pop = tk.Toplevel(self.root)
+        pop.title(f"일괄 영수증 발행 ({len(rows):,}건)")
+        x = self.root.winfo_x() + (self.root.winfo_width()//2) - 250
+        y = self.root.winfo_y() + (self.root.winfo_height()//2) - 200
+        pop.geometry(f"500x400+{x}+{y}")
+        pop.focus_set()
+
+        tk.Label(pop, text=f"선택된 운송 건: {len(rows):,}건 / 기본 운임 합계: {int(rows['배달운임'].sum()):,}원",
+                 font=("Malgun Gothic", 12, "bold"), fg="#4834d4").pack(anchor="w", padx=10, pady=10)
+
+        opt_frame = tk.LabelFrame(pop, text="모든 건에 같은 옵션 적용", font=self.font_bold, padx=10, pady=10)
+        opt_frame.pack(fill="x", padx=10, pady=5)
+        v_round, v_sun, v_tax = tk.BooleanVar(), tk.BooleanVar(), tk.BooleanVar(value=True)
+        v_wait_min, v_urgent, v_rack = tk.StringVar(value="0"), tk.IntVar(value=0), tk.IntVar(value=0)
+        tk.Checkbutton(opt_frame, text="왕복 운행 (x1.7)", variable=v_round).grid(row=0, column=0, sticky="w", padx=5)
+        tk.Checkbutton(opt_frame, text="휴일/야간 (+1만)", variable=v_sun, fg="red").grid(row=0, column=1, sticky="w", padx=5)
+        tk.Checkbutton(opt_frame, text="부가세 별도 발행", variable=v_tax, font=self.font_bold).grid(row=0, column=2, sticky="w", padx=5)
+        tk.Label(opt_frame, text="대기시간(분):", font=self.font_bold).grid(row=1, column=0, sticky="e", pady=5)
+        tk.Entry(opt_frame, textvariable=v_wait_min, width=5, justify="center").grid(row=1, column=1, sticky="w")
+        moto_frame = tk.LabelFrame(opt_frame, text="오토바이 건에만 적용", fg="purple")
+        moto_frame.grid(row=2, column=0, columnspan=3, sticky="we", pady=5)
+        tk.Radiobutton(moto_frame, text="일반", variable=v_urgent, value=0).pack(side="left", padx=5)
+        tk.Radiobutton(moto_frame, text="긴급(+1만)", variable=v_urgent, value=MOTO_URGENT_FEE, fg="orange").pack(side="left", padx=5)
+        tk.Radiobutton(moto_frame, text="우천(+2만)", variable=v_urgent, value=MOTO_RAIN_FEE, fg="red").pack(side="left", padx=5)
+        tk.Checkbutton(moto_frame, text="짐받이(+5천)", variable=v_rack, onvalue=MOTO_RACK_FEE, offvalue=0).pack(side="left", padx=10)
+
+        out_frame = tk.LabelFrame(pop, text="저장 방식", font=self.font_bold, padx=10, pady=5)
+        out_frame.pack(fill="x", padx=10, pady=5)
+        v_mode = tk.StringVar(value="book")
+        tk.Radiobutton(out_frame, text="엑셀 1개 (영수증마다 시트)", variable=v_mode, value="book").pack(anchor="w")
+        tk.Radiobutton(out_frame, text="폴더 1개 (영수증마다 파일)", variable=v_mode, value="folder").pack(anchor="w")
+
+        def issue_all():
+            try: mins = int(v_wait_min.get())
+            except: mins = 0
+            try:
+                quotes = quote_batch(rows['배달운임'].to_numpy(), round_trip=v_round.get(), wait_min=mins, holiday=v_sun.get(),
+                                     car_type=rows['차종_최종'].astype(str).to_numpy(), moto_urgent=v_urgent.get(),
+                                     moto_rack=v_rack.get() > 0, with_vat=v_tax.get())
+                issue_date = datetime.now().strftime("%Y-%m-%d")
+                # 영수증 행은 쓰는 순간에 하나씩 만들어 넘김 (전부 메모리에 올리지 않음)
+                receipts = (
+                    (str(cust), receipt_rows(str(cust), str(dest), str(car), dict(zip(QUOTE_COLS, map(int, q))), issue_date))
+                    for cust, dest, car, q in zip(rows['고객성명'], rows['도 착 지'], rows['차종_최종'], quotes.itertuples(index=False))
+                )
+                save_dir = get_receipt_dir()
+                stamp = datetime.now().strftime('%Y%m%d_%H%M')
+                if v_mode.get() == "book":
+                    target = os.path.join(save_dir, f"{stamp}_영수증_일괄_{len(rows)}건.xlsx")
+                    count = write_receipt_book(target, receipts)
+                else:
+                    target = os.path.join(save_dir, f"{stamp}_영수증_일괄")
+                    count = write_receipt_folder(target, receipts)
+                pop.destroy()
+                messagebox.showinfo("발행 완료", f"영수증 {count:,}건을 저장했습니다!\n위치: {target}\n총 청구 금액: {int(quotes['최종청구금액'].sum()):,}원")
+            except Exception as e: messagebox.showerror("실패", f"일괄 영수증 생성 오류: {e}")
+
+        tk.Button(pop, text=f"🖨️ {len(rows):,}건 일괄 발행", command=issue_all, bg="#27ae60", fg="white",
+                  font=("Malgun Gothic", 12, "bold"), height=2).pack(fill="x", padx=20, pady=10)
+
 if __name__ == "__main__":
-    root = tk.Tk(); app = BoraUltimateApp(root); root.mainloop()
+    set_log_tag('bora_calc')
+    maybe_start_profile('bora_calc')
+    # --server http://서버PC주소:8787 (또는 환경변수 BORA_SERVER) → 공유 서버에 붙는 가벼운 모드
+    server_url = os.environ.get(SERVER_ENV)
+    if '--server' in sys.argv[1:-1]:
+        server_url = sys.argv[sys.argv.index('--server') + 1]
+    root = tk.Tk(); app = BoraUltimateApp(root, server_url); root.mainloop()
@@ -0,0 +1,137 @@
+import re
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ===========================================================
+# 🚚 [차종 분류 엔진]
+# 도착지 문자열을 한 번만 정규화하고, 서로 다른 값만 분류한 뒤
+# 결과를 전체 행에 한꺼번에 되돌려 붙입니다.
+# ===========================================================
+
+DELETE_LABEL = "삭제대상"
+
+# 정규화된 도착지 → 차종 결과를 기억해 두는 개수 (병합/검색 등 여러 호출에서 공유)
+CACHE_SIZE = 200_000
+
+def final_refine_logic(text):
+    if pd.isna(text) or str(text).strip() == "": return "삭제대상"
+    t = str(text).replace(' ', '').upper()
+
+    # 0. 소형 우선 분류
+    if '/다' in t or '다마' in t: return "다마스"
+    if '/라' in t or '라보' in t: return "라보"
+    if '/오' in t or '오토' in t: return "오토바이"
+
+    # 1. 톤수 추출
+    ton = ""
+    if '2.5' in t or '25톤' in t or t.startswith('2.5'): ton = "2.5톤"
+    elif '3.5' in t or '35' in t: ton = "3.5톤"
+    elif '5톤' in t or '5T' in t or '5축' in t or '5톤축' in t: ton = "5톤"
+    elif any(k in t for k in ['1.4', '1.3', '1.5']): ton = "1.4톤"
+    elif any(k in t for k in ['1톤', '1T', '1카', '1탑', '1윙']): ton = "1톤"
+    elif any(x in t for x in ['11', '16', '25']) and '톤' in t:
+        m = re.search(r'(\d+)톤', t)
+        ton = m.group(0) if m else "대형"
+    else:
+        p_match = re.search(r'(\d+)P', t)
+        if p_match: return f"{p_match.group(1)}P"
+        return "미분류"
+
+    # 2. 옵션 판별
+    is_lift = any(k in t for k in ['리프트', '리프', '리', 'LIFT'])
+    is_wing_top = any(k in t for k in ['윙', '탑', 'WING', 'TOP', '캅'])
+    is_wide = '광폭' in t or '광' in t
+    is_axis = '축' in t
+    is_no_vibe = '무진동' in t
+
+    # 3. 명칭 확정
+    if ton == "5톤" and is_axis:
+        res = "5톤축차"
+    else:
+        res = ton
+
+    if is_wide and ton not in ["1톤", "1.4톤", "2.5톤"] and res != "5톤축차":
+        res += "광폭"
+
+    if is_no_vibe: res += "/무진동"
+    if is_lift: res += "리프트"
+    elif is_wing_top: res += "탑/윙"
+
+    return res
+
+# -----------------------------------------------------------
+# [정규화 + 캐시]
+# final_refine_logic 은 공백 제거 + 대문자 변환한 문자열만 보므로
+# 정규화된 값이 같으면 결과도 항상 같습니다.
+# -----------------------------------------------------------
+def normalize_dest(values):
+    """
+    도착지 Series 를 (정규화 키 Series, 삭제대상 여부 mask) 로 변환합니다.
+    빈칸/공백뿐인 값은 키 대신 mask 로 표시됩니다.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    raw = s.astype(object).where(s.notna(), None)
+    text = raw.map(str, na_action='ignore')
+    blank = text.isna() | (text.str.strip() == "")
+    keys = text.str.replace(' ', '', regex=False).str.upper()
+    return keys, blank.to_numpy(dtype=bool)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_key(key):
+    # key 는 normalize_dest 를 거친 값이어야 합니다
+    return final_refine_logic(key)
+
+def cache_info():
+    return classify_key.cache_info()
+
+def clear_cache():
+    classify_key.cache_clear()
+
+def classify_series(values):
+    """
+    도착지 Series 전체를 분류합니다. (final_refine_logic 을 행마다 apply 한 것과 동일)
+    서로 다른 정규화 값만 분류하고, 결과는 factorize 코드로 한 번에 펼칩니다.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    keys, blank = normalize_dest(s)
+    out = np.full(len(s), DELETE_LABEL, dtype=object)
+
+    live = ~blank
+    if live.any():
+        codes, uniques = pd.factorize(keys[live])
+        labels = np.array([classify_key(k) for k in uniques], dtype=object)
+        out[live] = labels[codes]
+    return pd.Series(out, index=s.index, dtype=object)
+
+# -----------------------------------------------------------
+# [회귀 검증용 샘플] classify_series 가 final_refine_logic 과 똑같은지 확인
+# -----------------------------------------------------------
+REGRESSION_CORPUS = [
+    None, float('nan'), "", "   ", "\t", 0, 1.4, 35, 2.5,
+    "군포 /다", "군포/다마스", "안양 /라", "라보 안산", "서울/오", "오토 강남", "/오토바이 긴급",
+    "부산 2.5", "2.5톤 리프트", "대구25톤윙", "2.5광폭", "평택 3.5", "3.5 광폭 무진동", "35번지 1톤",
+    "5톤", "5톤축", "5톤 축 윙", "5T 리프트", "5축", "5톤 광폭", "5t 탑",
+    "1.4 윙", "1.3톤", "1.5 리프트", "1톤", "1t 탑", "1카", "1탑", "1윙", "1톤 광폭", "1.4광",
+    "11톤 윙", "16톤", "25 톤", "11 톤 광폭 무진동 리프트", "16톤캅", "11톤축", "25톤 무진동",
+    "11 축", "16 광", "3P", "12p 용인", "P", "혼적 1톤", "합짐 /다", "인천 항만",
+    "리프트", "wing 1t", "TOP 1.4", "lift 3.5", "김포 11 톤 탑", "화성 1톤 혼적", "2,5톤",
+    "2.55", "0.5톤", "3.5리", "1.4톤 리프 윙", "오산 5 톤 축 광 폭", "서울 25", "서울 16 톤",
+]
+
+def self_check(corpus=None):
+    """회귀 샘플에서 classify_series 와 final_refine_logic 결과를 비교. 불일치 목록을 반환합니다."""
+    corpus = REGRESSION_CORPUS if corpus is None else corpus
+    s = pd.Series(list(corpus), dtype=object)
+    expected = s.apply(final_refine_logic)
+    got = classify_series(s)
+    return [(v, e, g) for v, e, g in zip(s, expected, got) if e != g]
+
+if __name__ == "__main__":
+    bad = self_check()
+    for v, e, g in bad:
+        print(f"❌ {v!r}: 기존={e} / 엔진={g}")
+    print("✅ 차종 분류 회귀 검증 통과" if not bad else f"❌ 불일치 {len(bad)}건")
+    sys.exit(1 if bad else 0)
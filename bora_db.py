@@ -0,0 +1,349 @@
+import os
+import sys
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from bora_perf import span
+
+# ===========================================================
+# 💾 [단가 DB] 엑셀 단가표 + 미리 정리해 둔 고속 로딩 파일
+# bora_merge.py 가 엑셀과 함께 .pkl 을 만들어 두면,
+# bora_calc.py 는 엑셀을 다시 파싱/정리하지 않고 바로 불러옵니다.
+# ===========================================================
+
+DB_NAME = '보라물류_최종정밀단가표.xlsx'
+PRICE_COLS = ['접수일자', '고객성명', '차종_최종', '도 착 지', '배달운임']
+
+# 저장 형식이 바뀌면 올려서 예전 파일을 무시하게 함
+FAST_DB_VERSION = 3
+
+# 고속 파일 조각: 최근 몇 달치는 한 조각, 그 이전은 연도별 조각 (계산기가 최근 조각부터 불러옴)
+RECENT_MONTHS = 3
+
+def fast_db_path(db_path):
+    return os.path.splitext(db_path)[0] + '.pkl'
+
+def source_stamp(db_path):
+    # 엑셀 원본의 (크기, 수정시각) - 고속 파일이 어느 엑셀에서 만들어졌는지 기록용
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+# -----------------------------------------------------------
+# [데이터 정리] 날짜 / 운임 / 분류 불가 행 제거
+# -----------------------------------------------------------
+def parse_dates(col):
+    """
+    bora_merge.py 는 접수일자를 'yy/mm/dd' 문자열로 저장합니다.
+    그대로 to_datetime 에 넣으면 일/월/년으로 잘못 읽히므로 그 형식은 명시해서 읽습니다.
+    """
+    text = col.astype(str).str.strip()
+    short = text.str.fullmatch(r'\d{2}/\d{2}/\d{2}')
+    out = pd.to_datetime(col.where(~short), errors='coerce')
+    if short.any():
+        out[short] = pd.to_datetime(text[short], format='%y/%m/%d', errors='coerce')
+    return out
+
+def clean_price_table(df):
+    df = df.copy()
+    df['접수일자'] = parse_dates(df['접수일자']).dt.strftime('%Y-%m-%d')
+    df = df.dropna(subset=['접수일자'])
+
+    if '배달운임' in df.columns:
+        df['배달운임'] = (
+            df['배달운임'].astype(str)
+            .str.replace(',', '')
+            .str.extract(r'(\d+)', expand=False)
+            .fillna(0).astype(int)
+        )
+
+    df = df[(df['차종_최종'] != "미분류") & (~df['차종_최종'].str.contains('P', na=False))]
+    return df.reset_index(drop=True)
+
+# -----------------------------------------------------------
+# [압축 형식] 오래된 노트북에서도 전체 이력을 올려둘 수 있게
+#  - 접수일자: 1970-01-01 기준 일수(int32)
+#  - 고객성명 / 차종_최종: category (사전 인코딩)
+#  - 도 착 지: 같은 문자열은 객체 하나를 공유 (intern)
+#  - 배달운임: int32
+# -----------------------------------------------------------
+def day_numbers(col):
+    # 'YYYY-MM-DD' 문자열 / 날짜 → 일수(int32). 이미 일수면 그대로
+    if pd.api.types.is_integer_dtype(col):
+        return col.to_numpy(dtype=np.int32)
+    return pd.to_datetime(col, errors='coerce').to_numpy(dtype='datetime64[D]').astype(np.int32)
+
+def to_day_number(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if hasattr(value, 'strftime'):
+        value = value.strftime('%Y-%m-%d')
+    return int(np.datetime64(str(value)[:10], 'D').astype(np.int64))
+
+def day_text(days):
+    # 일수 → 'YYYY-MM-DD' 문자열 배열 (화면 표시용)
+    days = np.asarray(days)
+    if days.dtype.kind in 'iu':
+        return np.datetime_as_string(days.astype('datetime64[D]'), unit='D').astype(object)
+    return days.astype(object)
+
+def intern_strings(col):
+    # 값 종류만큼만 문자열 객체를 두고 나머지 행은 같은 객체를 가리키게
+    codes, uniques = pd.factorize(col)
+    shared = np.array([sys.intern(u) if isinstance(u, str) else u for u in uniques] + [None], dtype=object)
+    return pd.Series(shared[codes], index=col.index, dtype=object)
+
+def is_compact(df):
+    return pd.api.types.is_integer_dtype(df['접수일자'])
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+def compact_price_table(df, report=True):
+    if is_compact(df): return df
+    before = memory_mb(df)
+    out = df.copy()
+    out['접수일자'] = day_numbers(df['접수일자'])
+    for c in ['고객성명', '차종_최종']:
+        if c in df.columns: out[c] = df[c].astype('category')
+    if '도 착 지' in df.columns: out['도 착 지'] = intern_strings(df['도 착 지'])
+    if '배달운임' in df.columns: out['배달운임'] = df['배달운임'].to_numpy(dtype=np.int32)
+    if report:
+        print(f"💾 단가표 메모리: {before:.1f}MB → {memory_mb(out):.1f}MB ({len(out):,}행)")
+    return out
+
+def expand_price_table(df):
+    # 압축 형식 → 예전과 같은 문자열/일반 정수 형식
+    if not is_compact(df): return df
+    out = df.copy()
+    out['접수일자'] = day_text(df['접수일자'].to_numpy())
+    for c in ['고객성명', '차종_최종']:
+        if c in df.columns: out[c] = df[c].astype(object)
+    if '배달운임' in df.columns: out['배달운임'] = df['배달운임'].astype(np.int64)
+    return out
+
+# -----------------------------------------------------------
+# [고속 파일 저장 / 불러오기]
+# -----------------------------------------------------------
+def split_parts(df):
+    """
+    압축 단가표 → [(시작 일수, 조각), ...] (최신 조각부터).
+    맨 앞은 가장 최근 RECENT_MONTHS 개월, 나머지는 연도별입니다.
+    조각끼리 날짜가 겹치지 않으므로 "시작 일수 이후는 이 조각까지 읽으면 전부" 가 됩니다.
+    """
+    if df.empty: return []
+    days = day_numbers(df['접수일자']).astype(np.int64)
+    newest_month = days.max().astype('datetime64[D]').astype('datetime64[M]')
+    cutoff = int((newest_month - (RECENT_MONTHS - 1)).astype('datetime64[D]').astype(np.int64))
+    year_start = days.astype('datetime64[D]').astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+    # 조각의 시작일: 최근 구간은 cutoff, 그 이전은 그 해 1월 1일
+    starts = np.where(days >= cutoff, cutoff, year_start)
+    parts = []
+    for start in np.unique(starts)[::-1]:
+        parts.append((int(start), df[starts == start].reset_index(drop=True)))
+    return parts
+
+def concat_parts(parts):
+    # 조각 합치기 - category 컬럼은 값 종류가 달라도 category 그대로 유지
+    parts = [p for p in parts if len(p)]
+    if not parts: return pd.DataFrame(columns=PRICE_COLS)
+    if len(parts) == 1: return parts[0].reset_index(drop=True)
+    out = pd.concat(parts, ignore_index=True)
+    for c in out.columns:
+        if isinstance(out[c].dtype, pd.CategoricalDtype): continue
+        if all(isinstance(p[c].dtype, pd.CategoricalDtype) for p in parts):
+            out[c] = pd.api.types.union_categoricals([p[c] for p in parts], ignore_order=True)
+    return out
+
+def save_fast_db(df_clean, db_path):
+    """
+    고속 파일에는 항상 압축 형식으로 저장 (파일도 작고 불러오자마자 바로 사용).
+    머리말(버전/원본/조각 목록) 다음에 조각을 최신부터 하나씩 pickle 로 이어 씁니다
+    → 계산기는 머리말과 첫 조각만 읽고 창을 띄운 뒤 나머지를 이어서 읽습니다.
+    """
+    parts = split_parts(compact_price_table(df_clean, report=False))
+    header = {
+        'version': FAST_DB_VERSION,
+        'source': source_stamp(db_path),
+        'rows': sum(len(p) for _, p in parts),
+        'parts': [(start, len(p)) for start, p in parts],
+    }
+    fast_p = fast_db_path(db_path)
+    tmp_p = fast_p + '.tmp'
+    with open(tmp_p, 'wb') as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        for _, part in parts:
+            pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_p, fast_p) # 계산기가 읽는 중이어도 반쯤 쓴 파일을 보지 않게
+    return fast_p
+
+def is_fast_db_fresh(db_path):
+    # 엑셀이 고속 파일을 만든 뒤로 바뀌지 않았는지 (머리말만 읽음)
+    try:
+        with open(fast_db_path(db_path), 'rb') as f:
+            return _fresh_header(f, db_path) is not None
+    except OSError:
+        return False
+
+def _fresh_header(f, db_path):
+    try:
+        header = pickle.load(f)
+    except Exception:
+        return None # 깨졌거나 pandas 버전이 달라 못 읽으면 엑셀로
+    if not isinstance(header, dict) or header.get('version') != FAST_DB_VERSION:
+        return None
+    return header if _payload_fresh(header, db_path) else None
+
+def open_fast_db(db_path):
+    """
+    최신 고속 파일이면 (머리말, 조각 iterator) / 아니면 None.
+    iterator 는 (시작 일수, 조각) 을 최신 조각부터 하나씩 읽어 돌려줍니다.
+    """
+    try:
+        f = open(fast_db_path(db_path), 'rb')
+    except OSError:
+        return None
+    header = _fresh_header(f, db_path)
+    if header is None:
+        f.close()
+        return None
+
+    def parts():
+        with f:
+            for start, _ in header['parts']:
+                yield start, pickle.load(f)
+    return header, parts()
+
+def _payload_fresh(payload, db_path):
+    current = source_stamp(db_path)
+    # 엑셀이 아예 없으면 고속 파일만이라도 사용
+    return current is None or payload.get('source') == current
+
+def load_fast_db(db_path):
+    opened = open_fast_db(db_path)
+    if opened is None: return None
+    try:
+        return concat_parts([part for _, part in opened[1]])
+    except Exception:
+        return None # 조각을 읽다가 깨진 부분이 있으면 엑셀로
+
+def load_price_table(db_path, compact=True):
+    """
+    정리된 단가표를 (DataFrame, 출처) 로 돌려줍니다. 출처는 'fast' 또는 'excel'.
+    고속 파일이 최신이 아니면 엑셀을 읽어 정리하고, 다음 실행을 위해 고속 파일을 다시 만들어 둡니다.
+    compact=True 면 압축 형식(일수 날짜, category 등), False 면 예전 문자열 형식입니다.
+    """
+    with span('db.load_fast') as sp:
+        df = load_fast_db(db_path)
+        sp['hit'] = df is not None
+    if df is not None:
+        if compact:
+            print(f"💾 단가표 메모리: {memory_mb(df):.1f}MB ({len(df):,}행, 고속 파일)")
+            return df, 'fast'
+        return expand_price_table(df), 'fast'
+
+    with span('db.read_excel'):
+        raw = pd.read_excel(db_path)
+    with span('db.clean', rows=len(raw)):
+        df = clean_price_table(raw)
+        if compact:
+            df = compact_price_table(df)
+    try:
+        save_fast_db(df, db_path)
+    except Exception:
+        pass # 쓰기 권한이 없어도 프로그램은 계속
+    return df, 'excel'
+
+def iter_price_parts(db_path):
+    """
+    정리된 단가표를 (시작 일수, 조각, 출처) 로 최신 조각부터 하나씩 돌려줍니다 (항상 압축 형식).
+    고속 파일이 최신이면 조각을 하나씩 읽고, 아니면 엑셀 전체를 읽어 정리한 뒤
+    (다음 실행을 위해 고속 파일도 다시 만들고) 같은 조각으로 나눕니다.
+    고속 파일 조각을 읽다 실패하면 (깨졌거나 다른 PC 의 pandas 로 만든 파일) 엑셀로 바꿔서
+    이미 넘긴 조각보다 오래된 조각만 이어서 돌려줍니다.
+    """
+    opened = open_fast_db(db_path)
+    delivered = None # 마지막으로 넘긴 조각의 시작 일수
+    if opened is not None:
+        parts = opened[1]
+        while True:
+            try:
+                item = _next_part(parts, 'fast')
+            except Exception as e:
+                print(f"⚠️ 고속 파일을 읽지 못해 엑셀에서 다시 읽습니다: {e}")
+                parts.close()
+                break
+            if item is None: return
+            delivered = item[0]
+            yield item
+
+    # 고속 파일 없음 / 오래됨 / 읽다 실패 → 엑셀 (load_price_table 이 고속 파일도 다시 만듦)
+    df, source = load_price_table(db_path, compact=True)
+    parts = iter([(start, part) for start, part in split_parts(df) if delivered is None or start < delivered])
+    while True:
+        item = _next_part(parts, source)
+        if item is None: return
+        yield item
+
+def _next_part(parts, source):
+    with span('db.load_part') as sp:
+        item = next(parts, None)
+        if item is None: return None
+        sp['rows'], sp['source'] = len(item[1]), source
+    return item[0], item[1], source
+
+# -----------------------------------------------------------
+# [자체 점검] python bora_db.py
+# -----------------------------------------------------------
+def _break_after_first_part(db_path):
+    # 머리말 + 첫 조각은 그대로 두고 그 뒤를 못 읽는 데이터로 (다른 PC 의 pandas 로 만든 파일 흉내)
+    with open(fast_db_path(db_path), 'r+b') as f:
+        pickle.load(f); pickle.load(f)
+        f.truncate(f.tell())
+        f.write(b'\x80\x05broken')
+
+def self_check():
+    """
+    고속 파일 조각이 중간부터 깨졌을 때 iter_price_parts 가 엑셀로 이어서
+    빠짐없이(중복 없이) 전체 행을 돌려주고 고속 파일을 다시 만드는지 확인. 문제 목록을 반환합니다.
+    """
+    months = pd.date_range('2023-01-15', periods=30, freq='MS') + pd.Timedelta(days=14)
+    raw = pd.DataFrame({
+        '접수일자': months.strftime('%y/%m/%d'),
+        '고객성명': [f"거래처{i % 4}" for i in range(len(months))],
+        '도 착 지': [f"군포 당정동 {i}번지 1톤" for i in range(len(months))],
+        '차종_최종': "1톤",
+        '배달운임': [f"{50 + i},000" for i in range(len(months))],
+    })
+    problems = []
+    with tempfile.TemporaryDirectory(prefix='bora_db_check_') as folder:
+        db_p = os.path.join(folder, DB_NAME)
+        raw.to_excel(db_p, index=False)
+        expected, _ = load_price_table(db_p) # 고속 파일도 여기서 만들어짐
+        if len(split_parts(expected)) < 3:
+            problems.append("점검용 단가표가 조각 3개 이상으로 나뉘지 않았습니다")
+
+        _break_after_first_part(db_p)
+        items = list(iter_price_parts(db_p))
+        sources = [source for _, _, source in items]
+        if sources[:1] != ['fast'] or 'excel' not in sources:
+            problems.append(f"조각 출처가 예상과 다릅니다: {sources}")
+        got = concat_parts([part for _, part, _ in items])
+        key = lambda df: sorted(zip(day_numbers(df['접수일자']).tolist(), df['배달운임'].tolist()))
+        if key(got) != key(expected):
+            problems.append(f"엑셀로 이어 읽은 행이 전체와 다릅니다 ({len(got)}행 / 전체 {len(expected)}행)")
+        if load_fast_db(db_p) is None:
+            problems.append("깨진 고속 파일이 다시 만들어지지 않았습니다")
+    return problems
+
+if __name__ == "__main__":
+    bad = self_check()
+    for problem in bad:
+        print(f"❌ {problem}")
+    print("✅ 고속 파일 점검 통과" if not bad else f"❌ 문제 {len(bad)}건")
+    sys.exit(1 if bad else 0)
@@ -1,98 +1,544 @@
+import numpy as np
 import pandas as pd
 import os
-import re
+import sys
 import glob
+import json
+import hashlib
+import heapq
+import pickle
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import Workbook, load_workbook
+
+# final_refine_logic 은 기존에 bora_merge 에서 가져다 쓰던 곳을 위해 그대로 노출
+from bora_classify import final_refine_logic, classify_series, normalize_dest
+from bora_db import DB_NAME, clean_price_table, save_fast_db, is_fast_db_fresh
+from bora_perf import span, collect, replay, set_log_tag, maybe_start_profile
+from bora_stats import fare_counts, combine_counts, subtract_counts, customer_keys, save_fare_stats, is_fare_stats_fresh
+
+OUTPUT_NAME = DB_NAME
+SAVE_COLS = ['접수일자', '고객성명', '도 착 지', '차종_최종', '배달운임']
+
+# 스트리밍 병합: 한 번에 읽는 행 수 / 디스크 정렬 조각을 나눠 쓰는 행 수 / 한 번에 합치는 정렬 조각 수
+STREAM_CHUNK_ROWS = 50_000
+RUN_BLOCK_ROWS = 5_000
+MERGE_FAN_IN = 16
+
+# 연도별 파일 파싱 결과 캐시 (바탕화면 아래 숨김 폴더)
+CACHE_DIR_NAME = '.bora_merge_cache'
+MANIFEST_NAME = 'manifest.json'
 
 # [1단계] 파일 자동 스캔 설정
-# 바탕화면 경로 자동 인식
-user_profile = os.environ['USERPROFILE']
-base_path = os.path.join(user_profile, 'OneDrive', '바탕 화면')
-if not os.path.exists(base_path): # 원드라이브 없으면 그냥 바탕화면
-    base_path = os.path.join(user_profile, 'Desktop')
-
-# 파일명에 'y'가 들어가는 엑셀 파일은 모두 찾기 (예: 2022y.xlsx, 2026y.xlsx 등)
-target_pattern = os.path.join(base_path, '*y.xlsx')
-files = glob.glob(target_pattern)
-
-print(f"📂 검색 경로: {base_path}")
-print(f"🔎 발견된 연도별 파일: {len(files)}개")
-
-def final_refine_logic(text):
-    if pd.isna(text) or str(text).strip() == "": return "삭제대상"
-    t = str(text).replace(' ', '').upper()
-    
-    # 0. 소형 우선 분류
-    if '/다' in t or '다마' in t: return "다마스"
-    if '/라' in t or '라보' in t: return "라보"
-    if '/오' in t or '오토' in t: return "오토바이"
-
-    # 1. 톤수 추출
-    ton = ""
-    if '2.5' in t or '25톤' in t or t.startswith('2.5'): ton = "2.5톤"
-    elif '3.5' in t or '35' in t: ton = "3.5톤"
-    elif '5톤' in t or '5T' in t or '5축' in t or '5톤축' in t: ton = "5톤"
-    elif any(k in t for k in ['1.4', '1.3', '1.5']): ton = "1.4톤"
-    elif any(k in t for k in ['1톤', '1T', '1카', '1탑', '1윙']): ton = "1톤"
-    elif any(x in t for x in ['11', '16', '25']) and '톤' in t:
-        m = re.search(r'(\d+)톤', t)
-        ton = m.group(0) if m else "대형"
-    else:
-        p_match = re.search(r'(\d+)P', t)
-        if p_match: return f"{p_match.group(1)}P"
-        return "미분류"
-
-    # 2. 옵션 판별
-    is_lift = any(k in t for k in ['리프트', '리프', '리', 'LIFT'])
-    is_wing_top = any(k in t for k in ['윙', '탑', 'WING', 'TOP', '캅'])
-    is_wide = '광폭' in t or '광' in t
-    is_axis = '축' in t
-    is_no_vibe = '무진동' in t
-
-    # 3. 명칭 확정
-    if ton == "5톤" and is_axis:
-        res = "5톤축차"
-    else:
-        res = ton
-    
-    if is_wide and ton not in ["1톤", "1.4톤", "2.5톤"] and res != "5톤축차":
-        res += "광폭"
-    
-    if is_no_vibe: res += "/무진동"
-    if is_lift: res += "리프트"
-    elif is_wing_top: res += "탑/윙"
-    
-    return res
-
-try:
-    all_data = []
-    if not files:
-        print("❌ '20xx.xlsx' 형식의 파일을 찾을 수 없습니다.")
-    else:
+def get_base_path():
+    # 바탕화면 경로 자동 인식
+    user_profile = os.environ['USERPROFILE']
+    base_path = os.path.join(user_profile, 'OneDrive', '바탕 화면')
+    if not os.path.exists(base_path): # 원드라이브 없으면 그냥 바탕화면
+        base_path = os.path.join(user_profile, 'Desktop')
+    return base_path
+
+def find_year_files(base_path):
+    # 파일명에 'y'가 들어가는 엑셀 파일은 모두 찾기 (예: 2022y.xlsx, 2026y.xlsx 등)
+    target_pattern = os.path.join(base_path, '*y.xlsx')
+    return sorted(glob.glob(target_pattern))
+
+# -----------------------------------------------------------
+# [2단계] 연도별 파일 1개 처리 (읽기 + 정리 + 차종 분류)
+# -----------------------------------------------------------
+def process_year_file(full_p):
+    with span('merge.read', file=os.path.basename(full_p)) as sp:
+        tmp = pd.read_excel(full_p)
+        sp['rows'] = len(tmp)
+    return clean_year_frame(tmp)
+
+def _pool_process_year_file(full_p):
+    # 풀 작업 프로세스는 로그 파일에 쓰지 않고 구간 시간을 부모에게 넘김
+    return collect(process_year_file, full_p)
+
+def clean_year_frame(tmp):
+    tmp['배달운임'] = tmp['배달운임'].astype(str).str.replace(',', '').str.extract(r'(\d+)').astype(float).fillna(0)
+    tmp['접수일자'] = pd.to_datetime(tmp['접수일자'], errors='coerce').dt.strftime('%y/%m/%d')
+    with span('merge.classify', rows=len(tmp)):
+        tmp['차종_최종'] = classify_series(tmp['도 착 지'])
+    tmp = tmp[tmp['차종_최종'] != "삭제대상"]
+    real_cols = [c for c in SAVE_COLS if c in tmp.columns]
+    return tmp[real_cols]
+
+def default_workers():
+    # 엑셀 파싱은 CPU 작업이므로 코어 수만큼 (최소 1개)
+    return max(1, os.cpu_count() or 1)
+
+def parse_year_files(paths, workers=None):
+    """
+    연도별 파일들을 프로세스 풀에서 동시에 처리합니다.
+    (순번, DataFrame 또는 Exception) 을 입력 순서대로 돌려주며,
+    한 파일이 실패해도 나머지 파일은 계속 진행됩니다.
+    """
+    if not paths: return
+    workers = min(len(paths), workers or default_workers())
+    for full_p in paths:
+        print(f"📦 {os.path.basename(full_p)} 통합 중...")
+
+    if workers <= 1:
+        # 파일이 하나뿐이면 프로세스를 띄우는 비용이 더 큼
+        for i, full_p in enumerate(paths):
+            try:
+                yield i, process_year_file(full_p)
+            except Exception as e:
+                yield i, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_pool_process_year_file, full_p) for full_p in paths]
+        for i, fut in enumerate(futures):
+            try:
+                df, records = fut.result()
+            except Exception as e:
+                yield i, e
+                continue
+            replay(records)
+            yield i, df
+
+# -----------------------------------------------------------
+# [증분 병합 캐시] 파일별 (경로, 크기, 수정시각, 내용 해시) 기준
+# -----------------------------------------------------------
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+# 이 파일들 중 하나라도 바뀌면(자동 업데이트 등) 예전 캐시는 전부 무효
+LOGIC_FILES = ['bora_merge.py', 'bora_classify.py', 'bora_stats.py']
+
+def logic_signature():
+    """
+    병합 로직 파일들의 해시. exe 로 묶어 배포하면 .py 가 옆에 없으므로 실행 파일 자체의 해시를 쓰고,
+    그것도 못 읽으면 None (→ 캐시를 믿을 수 없으니 전체 병합).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(here, f) for f in LOGIC_FILES]
+    if not all(os.path.exists(p) for p in paths):
+        paths = [sys.executable] if getattr(sys, 'frozen', False) else []
+    if not paths: return None
+    try:
+        return hashlib.sha1(''.join(file_digest(p) for p in paths).encode('ascii')).hexdigest()
+    except OSError:
+        return None
+
+def load_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get('files'), dict):
+            return manifest
+    except Exception:
+        pass # 없거나 깨졌으면 새로 시작
+    return {'files': {}, 'output': {}}
+
+def save_manifest(cache_dir, manifest):
+    tmp_p = os.path.join(cache_dir, MANIFEST_NAME + '.tmp')
+    with open(tmp_p, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_p, os.path.join(cache_dir, MANIFEST_NAME))
+
+def lookup_cache(full_p, entry, logic_sig, cache_dir):
+    """
+    캐시가 유효하면 (DataFrame, 갱신된 entry), 아니면 (None, 현재 파일 정보) 를 돌려줍니다.
+    크기/수정시각이 같으면 해시 계산 없이 바로 사용하고,
+    다르면 내용 해시까지 비교해서 (복사/동기화로 시각만 바뀐 경우) 재사용합니다.
+    """
+    st = os.stat(full_p)
+    info = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'logic': logic_sig}
+    cache_p = os.path.join(cache_dir, entry['cache']) if entry else None
+
+    if entry and entry.get('logic') == logic_sig and os.path.exists(cache_p):
+        fast_hit = entry.get('size') == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns
+        if not fast_hit:
+            info['sha1'] = file_digest(full_p)
+        if fast_hit or entry.get('sha1') == info['sha1']:
+            try:
+                return pd.read_pickle(cache_p), dict(entry, **info)
+            except Exception:
+                pass # 캐시 파일이 깨졌으면 다시 파싱
+
+    if 'sha1' not in info:
+        info['sha1'] = file_digest(full_p)
+    return None, info
+
+def store_cache(full_p, df, info, cache_dir):
+    cache_name = hashlib.sha1(os.path.abspath(full_p).encode('utf-8')).hexdigest() + '.pkl'
+    df.to_pickle(os.path.join(cache_dir, cache_name))
+    # 운임 통계용 조각도 같이 저장 → 다음 병합 때 바뀐 파일만 다시 계산
+    counts_name = cache_name[:-4] + '_counts.pkl'
+    fare_counts(df).to_pickle(os.path.join(cache_dir, counts_name))
+    return dict(info, cache=cache_name, counts=counts_name)
+
+def load_counts(entry, df, cache_dir):
+    # 캐시된 파일의 운임 조각 (예전 캐시라 없거나 깨졌으면 DataFrame 에서 다시 계산)
+    if entry.get('counts'):
+        try:
+            return pd.read_pickle(os.path.join(cache_dir, entry['counts']))
+        except Exception:
+            pass
+    return fare_counts(df)
+
+# -----------------------------------------------------------
+# [중복 제거] 주문 시스템에서 다시 내려받은 파일끼리 같은 배송이 겹치는 경우
+# (날짜, 거래처, 도착지, 운임) 을 정규화해서 해시 → 앞선 파일에 이미 있던 배송은 제외.
+# 같은 파일 안의 똑같은 행은 실제로 여러 대가 나간 것일 수 있어 그대로 두고,
+# 앞 파일에 2건 / 뒤 파일에 3건이면 뒤 파일에서 1건만 더합니다.
+# -----------------------------------------------------------
+def shipment_hashes(df):
+    keys, _ = normalize_dest(df['도 착 지'])
+    frame = pd.DataFrame({
+        '접수일자': df['접수일자'].astype(str).str.strip(),
+        '고객성명': customer_keys(df['고객성명']),
+        '도착지키': keys.fillna(""),
+        '배달운임': pd.to_numeric(df['배달운임'], errors='coerce').fillna(0).astype(np.int64),
+    })
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+def _hash_counts():
+    return pd.Series(dtype=np.int64, index=pd.Index([], dtype=np.uint64))
+
+class ShipmentDeduper:
+    """
+    파일 순서대로 filter() 에 행(또는 조각)을 넣고, 파일 하나가 끝날 때마다 end_file() 을 부릅니다.
+    메모리에는 행 전체가 아니라 해시별 건수만 남지만, 그 해시는 읽은 행 수만큼 계속 늘어납니다
+    (--stream 에서도 메모리가 일정하지 않은 유일한 부분).
+    """
+
+    def __init__(self):
+        self.seen = _hash_counts()    # 앞선 파일들: 해시 → 건수
+        self.current = _hash_counts() # 지금 파일 (조각 누적)
+
+    def filter(self, df):
+        # (남길 행, 중복으로 뺀 행)
+        if df.empty: return df, df.iloc[:0]
+        h = pd.Series(shipment_hashes(df))
+        occurrence = h.groupby(h).cumcount().to_numpy() + h.map(self.current).fillna(0).to_numpy(dtype=np.int64)
+        keep = occurrence >= h.map(self.seen).fillna(0).to_numpy(dtype=np.int64)
+        self.current = self.current.add(h.value_counts(), fill_value=0).astype(np.int64)
+        return df[keep], df[~keep]
+
+    def end_file(self):
+        self.seen = pd.concat([self.seen, self.current]).groupby(level=0).max()
+        self.current = _hash_counts()
+
+def report_duplicates(dup_counts):
+    # dup_counts: [(파일명, 중복 건수)]
+    total = sum(n for _, n in dup_counts)
+    if not total:
+        print("🧹 파일 간 중복 배송 없음")
+        return total
+    for f_name, n in dup_counts:
+        if n: print(f"🧹 {f_name}: 앞선 파일과 겹치는 배송 {n:,}건 제외")
+    print(f"🧹 중복 배송 총 {total:,}건 제외")
+    return total
+
+# -----------------------------------------------------------
+# [3단계] 통합 실행
+# -----------------------------------------------------------
+def run_merge(base_path, files, incremental=True, workers=None):
+    cache_dir = os.path.join(base_path, CACHE_DIR_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    logic_sig = logic_signature()
+    if logic_sig is None and incremental:
+        print("⚠️ 병합 로직 파일을 찾을 수 없어 캐시 없이 전체 병합합니다.")
+        incremental = False
+    manifest = load_manifest(cache_dir) if incremental else {'files': {}, 'output': {}}
+
+    # 1차: 캐시 확인 (메인 프로세스) → 바뀐 파일만 골라내기
+    slots = [None] * len(files) # 결과는 파일 순서대로 모아서 합침
+    counts = [None] * len(files) # 파일별 운임 조각 (통계용)
+    infos = {}
+    misses = []
+    new_files = {}
+    for i, full_p in enumerate(files):
+        f_name = os.path.basename(full_p)
+        key = os.path.abspath(full_p)
+        try:
+            cached, info = lookup_cache(full_p, manifest['files'].get(key), logic_sig, cache_dir)
+        except Exception as e:
+            print(f"⚠️ {f_name} 읽기 실패: {e}")
+            continue
+        if cached is not None:
+            print(f"♻️ {f_name} 변경 없음 (캐시 사용)")
+            slots[i] = cached
+            counts[i] = load_counts(info, cached, cache_dir)
+            new_files[key] = info
+        else:
+            infos[i] = info
+            misses.append(i)
+
+    # 2차: 바뀐 파일만 병렬로 읽기 + 분류
+    changed = 0
+    for i, result in parse_year_files([files[i] for i in misses], workers=workers):
+        full_p = files[misses[i]]
+        f_name = os.path.basename(full_p)
+        if isinstance(result, Exception):
+            print(f"⚠️ {f_name} 읽기 실패: {result}")
+            continue
+        slots[misses[i]] = result
+        try:
+            new_files[os.path.abspath(full_p)] = store_cache(full_p, result, infos[misses[i]], cache_dir)
+        except Exception as e:
+            print(f"⚠️ {f_name} 캐시 저장 실패: {e}")
+        counts[misses[i]] = fare_counts(result)
+        changed += 1
+
+    all_data = [d for d in slots if d is not None]
+
+    # 사라진 연도 파일의 캐시 정리
+    for key, entry in manifest['files'].items():
+        if key in new_files: continue
+        for name in (entry.get('cache'), entry.get('counts')):
+            stale_p = os.path.join(cache_dir, name) if name else None
+            if stale_p and os.path.exists(stale_p): os.remove(stale_p)
+    manifest['files'] = new_files
+
+    if not all_data:
+        save_manifest(cache_dir, manifest)
+        return None, False
+
+    output_p = os.path.join(base_path, OUTPUT_NAME)
+
+    # 입력 구성이 지난번과 똑같고 결과 파일도 그대로면 다시 쓸 필요 없음
+    input_sig = hashlib.sha1(json.dumps(sorted((k, v['sha1']) for k, v in new_files.items())).encode('utf-8')).hexdigest()
+    last_out = manifest.get('output', {})
+    if (incremental and changed == 0 and os.path.exists(output_p)
+            and last_out.get('inputs') == input_sig
+            and last_out.get('mtime_ns') == os.stat(output_p).st_mtime_ns
+            and is_fast_db_fresh(output_p)
+            and is_fare_stats_fresh(output_p)):
+        print(f"\n✅ 변경된 연도 파일이 없어 '{OUTPUT_NAME}' 를 그대로 사용합니다.")
+        save_manifest(cache_dir, manifest)
+        return output_p, False
+
+    # 파일 순서대로 중복 제거 (연도 파일 캐시는 원본 그대로 두고 병합할 때마다 다시 거름)
+    with span('merge.dedup') as sp:
+        dedup = ShipmentDeduper()
+        dropped, dup_counts = [], []
+        for i, d in enumerate(slots):
+            if d is None: continue
+            slots[i], dup = dedup.filter(d)
+            dedup.end_file()
+            dropped.append(dup)
+            dup_counts.append((os.path.basename(files[i]), len(dup)))
+        sp['dropped'] = report_duplicates(dup_counts)
+    all_data = [d for d in slots if d is not None]
+
+    with span('merge.sort') as sp:
+        df = pd.concat(all_data, ignore_index=True)
+        df = df.sort_values(by='접수일자', ascending=False, kind='stable')
+        sp['rows'] = len(df)
+
+    real_cols = [c for c in SAVE_COLS if c in df.columns]
+    with span('merge.write', rows=len(df)):
+        df[real_cols].to_excel(output_p, index=False)
+
+    # 계산기용 고속 로딩 파일 (엑셀 다시 파싱 + 날짜/운임 정리 생략용)
+    try:
+        with span('merge.fast_db'):
+            save_fast_db(clean_price_table(df[real_cols]), output_p)
+    except Exception as e:
+        print(f"⚠️ 고속 DB 저장 실패 (엑셀은 정상): {e}")
+
+    # 과거 운임 통계 (파일별 조각을 합치기만 함)
+    try:
+        with span('merge.fare_stats'):
+            # 파일별 조각은 중복 제거 전 기준이므로, 이번에 뺀 행만큼 건수를 빼서 맞춤
+            stats_counts = combine_counts(counts)
+            removed = [d for d in dropped if len(d)]
+            if removed:
+                stats_counts = subtract_counts(stats_counts, fare_counts(pd.concat(removed, ignore_index=True)))
+            save_fare_stats(stats_counts, output_p)
+    except Exception as e:
+        print(f"⚠️ 운임 통계 저장 실패 (엑셀은 정상): {e}")
+
+    manifest['output'] = {'inputs': input_sig, 'mtime_ns': os.stat(output_p).st_mtime_ns}
+    save_manifest(cache_dir, manifest)
+    return output_p, True
+
+# -----------------------------------------------------------
+# [대용량 스트리밍 병합] (--stream)
+# 행을 조각(chunk) 단위로 읽어 정리/분류 → 조각마다 정렬해서 디스크에 임시 저장
+# → 접수일자 기준 k-way 병합 → 엑셀에 한 줄씩 기록.
+# 임시 파일은 이력이 길수록 많아지므로 MERGE_FAN_IN 개씩 묶어 더 큰 임시 파일로 먼저 합치고
+# (필요하면 여러 번), 마지막에 남은 MERGE_FAN_IN 개 이하만 엑셀로 병합합니다.
+# 그래서 행 데이터는 연도 파일이 몇 개든 조각 하나 + 묶음 (MERGE_FAN_IN + 1)개만 메모리에 올라갑니다.
+# 단, 파일 간 중복 제거(ShipmentDeduper)는 지금까지 읽은 행마다 해시 1개를
+# 들고 있으므로 이 부분은 전체 이력에 비례해서 늘어납니다
+# (행당 약 50바이트, 파일이 끝날 때 합치는 동안 잠깐 2배 넘게 → 1천만 행이면 0.5~1GB 안팎).
+# -----------------------------------------------------------
+def iter_excel_chunks(full_p, chunk_rows=STREAM_CHUNK_ROWS):
+    # 읽기 전용 모드로 행을 순서대로 읽어 DataFrame 조각으로 묶기
+    wb = load_workbook(full_p, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None: return
+        header = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+        buf = []
+        for r in rows:
+            buf.append(r)
+            if len(buf) >= chunk_rows:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+    finally:
+        wb.close()
+
+def spill_run(chunk, run_p):
+    # 정렬된 조각을 작은 묶음 여러 개로 나눠 저장 (병합할 때 묶음 하나씩만 읽도록)
+    chunk = chunk.reindex(columns=SAVE_COLS)
+    chunk = chunk.sort_values(by='접수일자', ascending=False, kind='stable')
+    with open(run_p, 'wb') as f:
+        for start in range(0, len(chunk), RUN_BLOCK_ROWS):
+            block = chunk.iloc[start:start + RUN_BLOCK_ROWS].astype(object)
+            pickle.dump(block.where(block.notna(), None).values.tolist(), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def read_run(run_p):
+    with open(run_p, 'rb') as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+def write_run(rows, run_p):
+    # 이미 정렬된 행들을 spill_run 과 같은 묶음 형식으로 저장
+    with open(run_p, 'wb') as f:
+        block = []
+        for row in rows:
+            block.append(row)
+            if len(block) >= RUN_BLOCK_ROWS:
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+                block = []
+        if block:
+            pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def run_sort_key(row):
+    # 최신 날짜가 먼저, 날짜 없는 행은 맨 뒤 (pandas sort_values 와 같은 순서)
+    d = row[0]
+    return (d is not None, d or '')
+
+def merge_runs(runs):
+    # 같은 날짜끼리는 앞쪽 임시 파일의 행이 먼저 (= 읽은 순서 유지)
+    return heapq.merge(*(read_run(p) for p in runs), key=run_sort_key, reverse=True)
+
+def reduce_runs(runs, run_dir, fan_in=MERGE_FAN_IN):
+    """
+    임시 파일이 fan_in 개보다 많으면 앞에서부터 fan_in 개씩 합쳐 더 큰 임시 파일로 만들기를 반복.
+    이웃한 파일끼리만 합치므로 한 번에 전부 병합한 것과 행 순서가 같습니다.
+    """
+    level = 0
+    while len(runs) > fan_in:
+        level += 1
+        merged = []
+        with span('merge.stream_reduce', runs=len(runs), level=level):
+            for start in range(0, len(runs), fan_in):
+                group = runs[start:start + fan_in]
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                run_p = os.path.join(run_dir, f"merge{level}_{len(merged):05d}.pkl")
+                write_run(merge_runs(group), run_p)
+                for p in group: os.remove(p)
+                merged.append(run_p)
+        runs = merged
+    return runs
+
+def stream_merge(base_path, files):
+    output_p = os.path.join(base_path, OUTPUT_NAME)
+    seen_cols = set()
+    total = 0
+    dedup = ShipmentDeduper() # 조각 단위로 걸러도 결과는 일반 병합과 같음
+    dup_counts = []
+    with tempfile.TemporaryDirectory(prefix='bora_merge_') as run_dir:
+        runs = []
         for full_p in files:
             f_name = os.path.basename(full_p)
-            print(f"📦 {f_name} 통합 중...")
+            print(f"📦 {f_name} 스트리밍 통합 중...")
+            n_dup = 0
             try:
-                tmp = pd.read_excel(full_p)
-                all_data.append(tmp)
+                for chunk in iter_excel_chunks(full_p):
+                    chunk = clean_year_frame(chunk)
+                    if chunk.empty: continue
+                    seen_cols.update(chunk.columns)
+                    chunk, dup = dedup.filter(chunk)
+                    n_dup += len(dup)
+                    if chunk.empty: continue
+                    run_p = os.path.join(run_dir, f"run_{len(runs):05d}.pkl")
+                    spill_run(chunk, run_p)
+                    runs.append(run_p)
+                    total += len(chunk)
             except Exception as e:
                 print(f"⚠️ {f_name} 읽기 실패: {e}")
+            dedup.end_file()
+            dup_counts.append((f_name, n_dup))
 
-    if all_data:
-        df = pd.concat(all_data, ignore_index=True)
-        df['배달운임'] = df['배달운임'].astype(str).str.replace(',', '').str.extract(r'(\d+)').astype(float).fillna(0)
-        df['접수일자'] = pd.to_datetime(df['접수일자'], errors='coerce').dt.strftime('%y/%m/%d')
-        df['차종_최종'] = df['도 착 지'].apply(final_refine_logic)
-        df = df[df['차종_최종'] != "삭제대상"]
-        df = df.sort_values(by='접수일자', ascending=False)
-        output_p = os.path.join(base_path, '보라물류_최종정밀단가표.xlsx')
-        
-        save_cols = ['접수일자', '고객성명', '도 착 지', '차종_최종', '배달운임']
-        real_cols = [c for c in save_cols if c in df.columns]
-        
-        df[real_cols].to_excel(output_p, index=False)
-        print("\n🚀 [성공] '보라물류_최종정밀단가표.xlsx' 생성 완료!")
-        print(f"저장 위치: {output_p}")
-        
-except Exception as e:
-    print(f"❌ 오류 발생: {e}")
-    input("엔터를 누르면 종료합니다...")
+        report_duplicates(dup_counts)
+        if not runs:
+            return None, False
+
+        # 연도 파일에 실제로 있던 컬럼만 저장 (기존 병합과 동일)
+        keep = [i for i, c in enumerate(SAVE_COLS) if c in seen_cols]
+        n_runs = len(runs)
+        runs = reduce_runs(runs, run_dir)
+        with span('merge.stream_write', rows=total, runs=len(runs)):
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet()
+            ws.append([SAVE_COLS[i] for i in keep])
+            for row in merge_runs(runs):
+                ws.append([row[i] for i in keep])
+            wb.save(output_p)
+
+    print(f"📝 {total:,}행 기록 (정렬 조각 {n_runs}개 병합)")
+    # 고속 DB(.pkl)는 전체를 메모리에 올려야 하므로 만들지 않음 → 계산기가 처음 켤 때 엑셀에서 다시 만듦
+    return output_p, True
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # --full : 캐시를 무시하고 모든 연도 파일을 새로 읽기
+    incremental = '--full' not in argv
+    # --serial : 프로세스 풀 없이 한 파일씩 처리 (문제 확인용)
+    workers = 1 if '--serial' in argv else None
+    # --stream : 아주 큰 연도 파일용. 행 데이터는 메모리를 일정하게 유지하며 병합 (캐시/병렬 미사용)
+    #            중복 제거용 해시(행당 약 50바이트)만은 전체 행 수에 비례해서 늘어남
+    streaming = '--stream' in argv
+
+    base_path = get_base_path()
+    files = find_year_files(base_path)
+
+    print(f"📂 검색 경로: {base_path}")
+    print(f"🔎 발견된 연도별 파일: {len(files)}개")
+
+    try:
+        if not files:
+            print("❌ '20xx.xlsx' 형식의 파일을 찾을 수 없습니다.")
+            return
+
+        if streaming:
+            output_p, written = stream_merge(base_path, files)
+        else:
+            output_p, written = run_merge(base_path, files, incremental=incremental, workers=workers)
+        if written:
+            print(f"\n🚀 [성공] '{OUTPUT_NAME}' 생성 완료!")
+            print(f"저장 위치: {output_p}")
+
+    except Exception as e:
+        print(f"❌ 오류 발생: {e}")
+        input("엔터를 누르면 종료합니다...")
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support() # exe로 묶어서 배포할 때 필요
+    set_log_tag('bora_merge')
+    maybe_start_profile('bora_merge')
+    main()
@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+# ===========================================================
+# 📈 [성능 기록] "프로그램이 느려요" 할 때 확인할 수 있도록
+#  - span(): 구간별 소요 시간을 로그 파일(bora_perf_<프로그램>.log, 자동 교체)에 기록
+#    계산기 / 병합 / 서버가 동시에 떠 있어도 파일을 나눠 쓰므로 서로 교체(rollover)를 막지 않음
+#    병합의 프로세스 풀 작업은 파일에 쓰지 않고 기록을 모아 부모에게 넘김 (collect / replay)
+#  - 환경변수 BORA_PROFILE=1       → 실행 전체를 cProfile 로 기록(.prof)
+#  - 환경변수 BORA_PERF_STATUS=1   → 계산기 하단에 구간 시간 표시
+#  - 환경변수 BORA_LOG_DIR         → 로그/프로파일 저장 위치 (기본: 내 폴더\.bora_logs)
+# ===========================================================
+
+LOG_NAME = 'bora_perf_{tag}.log'
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 3
+
+PROFILE_ENV = 'BORA_PROFILE'
+STATUS_ENV = 'BORA_PERF_STATUS'
+LOG_DIR_ENV = 'BORA_LOG_DIR'
+
+# 최근 구간 기록 (상태 표시줄용) - 여러 스레드가 쓰므로 _lock 을 잡고 다룸
+recent = deque(maxlen=100)
+
+_logger = None
+_lock = threading.Lock()
+_tag = None
+_collected = None # collect() 중이면 로그 파일 대신 여기에 모음
+
+def set_log_tag(tag):
+    # 프로그램마다 로그 파일을 따로 (이미 열린 로그가 있으면 닫고 다음 기록부터 새 파일)
+    global _tag, _logger
+    with _lock:
+        _tag = tag
+        if _logger is not None:
+            for handler in list(_logger.handlers):
+                _logger.removeHandler(handler)
+                handler.close()
+            _logger = None
+
+def log_tag():
+    if _tag: return _tag
+    name = os.path.splitext(os.path.basename(sys.argv[0] if sys.argv and sys.argv[0] else ''))[0]
+    return name or 'bora'
+
+def log_dir():
+    return os.environ.get(LOG_DIR_ENV) or os.path.join(os.path.expanduser('~'), '.bora_logs')
+
+def get_logger():
+    global _logger
+    with _lock:
+        if _logger is not None: return _logger
+        logger = logging.getLogger('bora.perf')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        try:
+            os.makedirs(log_dir(), exist_ok=True)
+            handler = RotatingFileHandler(os.path.join(log_dir(), LOG_NAME.format(tag=log_tag())), maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUPS, encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(asctime)s [%(process)d] %(message)s'))
+        except Exception:
+            handler = logging.NullHandler() # 기록 실패로 프로그램이 멈추면 안 됨
+        logger.addHandler(handler)
+        _logger = logger
+        return logger
+
+def record(name, ms, **fields):
+    if _collected is not None:
+        _collected.append((name, ms, fields))
+        return
+    extra = ' '.join(f"{k}={v}" for k, v in fields.items())
+    get_logger().info(f"{name} {ms:.1f}ms {extra}".rstrip())
+    with _lock:
+        recent.append((name, ms, fields))
+
+@contextmanager
+def span(name, **fields):
+    """
+    with span('search.filter') as sp:
+        ...
+        sp['rows'] = len(rows)   # 끝난 뒤 함께 기록할 값
+    """
+    t = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        record(name, (time.perf_counter() - t) * 1000, **fields)
+
+def collect(fn, *args):
+    """
+    프로세스 풀 작업용: fn(*args) 실행 중 기록은 파일에 쓰지 않고 모아서 (결과, 기록 목록) 으로 돌려줍니다.
+    부모 프로세스가 replay(기록 목록) 으로 자기 로그에 남깁니다.
+    """
+    global _collected
+    _collected = []
+    try:
+        return fn(*args), _collected
+    finally:
+        _collected = None
+
+def replay(records):
+    for name, ms, fields in records:
+        record(name, ms, **fields)
+
+def last(name):
+    # 이름이 name 인 가장 최근 기록 (ms, fields) / 없으면 None
+    # (다른 스레드가 기록하는 중에 훑으면 deque 가 바뀌었다는 오류가 나므로 잠금 안에서 복사한 뒤 훑음)
+    with _lock:
+        records = list(recent)
+    for n, ms, fields in reversed(records):
+        if n == name: return ms, fields
+    return None
+
+def status_enabled():
+    return os.environ.get(STATUS_ENV) == '1'
+
+def maybe_start_profile(tag):
+    """BORA_PROFILE 이 켜져 있으면 cProfile 을 시작하고, 종료할 때 .prof 파일로 저장합니다."""
+    if not os.environ.get(PROFILE_ENV): return None
+    import cProfile
+    profiler = cProfile.Profile()
+    out_p = os.path.join(log_dir(), f"{tag}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+
+    def dump():
+        profiler.disable()
+        try:
+            os.makedirs(log_dir(), exist_ok=True)
+            profiler.dump_stats(out_p)
+            print(f"📈 프로파일 저장: {out_p}")
+        except Exception as e:
+            print(f"⚠️ 프로파일 저장 실패: {e}")
+
+    atexit.register(dump)
+    profiler.enable()
+    return out_p
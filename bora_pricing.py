@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# ===========================================================
+# 💰 [운임 계산 엔진] 화면 없이 쓰는 견적 규칙
+#  - quote()       : 1건 견적 (견적 팝업에서 사용)
+#  - quote_batch() : 수천 건을 배열로 한 번에 (월말 재견적 / 정산용)
+# 두 함수의 결과(정수)는 항상 같아야 합니다.
+# ===========================================================
+
+ROUND_TRIP_RATE = 0.7    # 왕복 운행: 기본 운임의 70% 추가 (x1.7)
+WAIT_UNIT_MIN = 10       # 대기료: 10분당
+WAIT_UNIT_FEE = 1000     #         1천원
+HOLIDAY_FEE = 10000      # 휴일/야간 할증
+MOTO_URGENT_FEE = 10000  # 오토바이 긴급
+MOTO_RAIN_FEE = 20000    # 오토바이 우천
+MOTO_RACK_FEE = 5000     # 오토바이 짐받이
+VAT_RATE = 0.1           # 부가세 10%
+
+# 견적 결과 항목 (영수증에 그대로 들어가는 이름)
+QUOTE_COLS = ["기본운임", "왕복할증", "대기료", "휴일할증", "기타할증", "공급가액", "부가세", "최종청구금액"]
+
+def is_motorcycle(car_type):
+    return "오토바이" in str(car_type)
+
+def quote(base_fare, round_trip=False, wait_min=0, holiday=False, car_type="",
+          moto_urgent=0, moto_rack=False, with_vat=True):
+    """
+    1건 견적. moto_urgent 는 추가 금액(0 / MOTO_URGENT_FEE / MOTO_RAIN_FEE),
+    moto_rack 은 짐받이 여부이며 두 옵션 모두 차종이 오토바이일 때만 붙습니다.
+    QUOTE_COLS 항목을 가진 dict 를 돌려줍니다.
+    """
+    current_fare = base_fare
+    data_row = dict.fromkeys(QUOTE_COLS, 0)
+    data_row["기본운임"] = base_fare
+
+    if round_trip:
+        added = int(current_fare * ROUND_TRIP_RATE)
+        current_fare += added; data_row["왕복할증"] = added
+
+    if wait_min > 0:
+        wait_cost = (wait_min // WAIT_UNIT_MIN) * WAIT_UNIT_FEE
+        current_fare += wait_cost; data_row["대기료"] = wait_cost
+
+    if holiday:
+        current_fare += HOLIDAY_FEE; data_row["휴일할증"] = HOLIDAY_FEE
+
+    if is_motorcycle(car_type):
+        total_moto_add = moto_urgent + (MOTO_RACK_FEE if moto_rack else 0)
+        if total_moto_add > 0:
+            current_fare += total_moto_add; data_row["기타할증"] = total_moto_add
+
+    supply_price = int(current_fare); data_row["공급가액"] = supply_price
+
+    final_total = supply_price
+    if with_vat:
+        vat = int(supply_price * VAT_RATE)
+        final_total += vat; data_row["부가세"] = vat
+
+    data_row["최종청구금액"] = final_total
+    return data_row
+
+def quote_batch(base_fares, round_trip=False, wait_min=0, holiday=False, car_type="",
+                moto_urgent=0, moto_rack=False, with_vat=True):
+    """
+    여러 건을 한 번에 견적합니다. 각 인자는 배열(건별 옵션) 또는 값 하나(전체 공통) 모두 가능.
+    QUOTE_COLS 컬럼(int64)을 가진 DataFrame 을 돌려줍니다. 행 순서는 base_fares 와 같습니다.
+    """
+    base = np.asarray(base_fares, dtype=np.int64)
+    n = len(base)
+
+    def arr(v, dtype):
+        return np.broadcast_to(np.asarray(v, dtype=dtype), (n,))
+
+    # int(x * 0.7) 과 똑같이: float64 곱셈 후 0 방향 버림
+    round_add = np.where(arr(round_trip, bool), np.trunc(base * ROUND_TRIP_RATE).astype(np.int64), 0)
+
+    mins = arr(wait_min, np.int64)
+    wait_cost = np.where(mins > 0, (mins // WAIT_UNIT_MIN) * WAIT_UNIT_FEE, 0)
+
+    holiday_add = np.where(arr(holiday, bool), HOLIDAY_FEE, 0)
+
+    if np.ndim(car_type) == 0:
+        moto = np.full(n, is_motorcycle(car_type))
+    else:
+        moto = pd.Series(np.asarray(car_type, dtype=object)).astype(str).str.contains("오토바이", regex=False).to_numpy(dtype=bool)
+    moto_add = arr(moto_urgent, np.int64) + np.where(arr(moto_rack, bool), MOTO_RACK_FEE, 0)
+    moto_add = np.where(moto & (moto_add > 0), moto_add, 0)
+
+    supply = base + round_add + wait_cost + holiday_add + moto_add
+    vat = np.where(arr(with_vat, bool), np.trunc(supply * VAT_RATE).astype(np.int64), 0)
+
+    return pd.DataFrame({
+        "기본운임": base,
+        "왕복할증": round_add,
+        "대기료": wait_cost,
+        "휴일할증": holiday_add,
+        "기타할증": moto_add,
+        "공급가액": supply,
+        "부가세": vat,
+        "최종청구금액": supply + vat,
+    }, columns=QUOTE_COLS).astype(np.int64)
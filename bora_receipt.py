@@ -0,0 +1,80 @@
+import os
+import re
+from datetime import datetime
+
+from openpyxl import Workbook
+
+# ===========================================================
+# 🧾 [영수증 발행] 1건 / 여러 건 일괄
+# 엑셀은 openpyxl 의 write_only(스트리밍) 모드로 써서
+# 수백 건을 한 번에 만들어도 메모리가 늘지 않습니다.
+# ===========================================================
+
+SUPPLIER_ROWS = [
+    ["[ 공급자 정보 ]", ""], ["등록번호", "123-86-13156"], ["상    호", "보라물류"], ["대 표 자", "백병순"],
+    ["주    소", "경기도 군포시 당정동 103-3 1층"], ["업    태", "운수"], ["종    목", "퀵서비스, 운송주선, 화물운송"],
+]
+
+def get_receipt_dir():
+    user_profile = os.environ['USERPROFILE']
+    save_dir = os.path.join(user_profile, 'Desktop')
+    if not os.path.exists(save_dir): save_dir = os.path.join(user_profile, '바탕 화면')
+    return save_dir
+
+def safe_name(text):
+    # 파일/시트 이름에 못 쓰는 글자 제거
+    return re.sub(r'[\\/:*?"<>|\[\]]', '', str(text)).strip()
+
+def receipt_rows(cust_name, dest_name, car_type, data_dict, issue_date=None):
+    """영수증 한 장의 (항목, 내용) 행 목록. data_dict 는 bora_pricing.quote 결과입니다."""
+    issue_date = issue_date or datetime.now().strftime("%Y-%m-%d")
+    rows = [["보라물류 운송 영수증(견적서)", ""], ["", ""], ["", ""]]
+    rows += SUPPLIER_ROWS
+    rows += [
+        ["", ""],
+        ["[ 운송 내역 ]", ""], ["일    자", issue_date],
+        ["공급받는자", cust_name], ["운행구간", dest_name], ["차    종", car_type],
+        ["", ""],
+        ["[ 금액 산출 내역 ]", ""], ["항    목", "금    액"], ["--------------------", "--------------------"],
+        ["기본 운임", f"{data_dict['기본운임']:,}"],
+    ]
+
+    if data_dict['왕복할증'] > 0: rows.append(["왕복 할증", f"{data_dict['왕복할증']:,}"])
+    if data_dict['대기료'] > 0: rows.append(["대기료", f"{data_dict['대기료']:,}"])
+    if data_dict['휴일할증'] > 0: rows.append(["휴일/야간 할증", f"{data_dict['휴일할증']:,}"])
+    if data_dict['기타할증'] > 0: rows.append(["오토바이/기타 할증", f"{data_dict['기타할증']:,}"])
+
+    rows.extend([["", ""], ["공급가액", f"{data_dict['공급가액']:,}"], ["부 가 세", f"{data_dict['부가세']:,}"], ["", ""], ["총 합 계", f"{data_dict['최종청구금액']:,}"], ["", ""], ["위 금액을 정히 영수(청구)합니다.", ""], ["보라물류 (인)", ""]])
+    return rows
+
+def _write_sheet(wb, title, rows):
+    ws = wb.create_sheet(title=title)
+    for r in rows:
+        ws.append(r)
+
+def write_receipt_file(save_path, rows):
+    wb = Workbook(write_only=True)
+    _write_sheet(wb, "영수증", rows)
+    wb.save(save_path)
+    return save_path
+
+def write_receipt_book(save_path, receipts):
+    """
+    receipts: (거래처명, 영수증 행 목록) 을 차례로 내주는 iterable.
+    한 파일 안에 영수증마다 시트 1장씩 씁니다. 발행한 장 수를 돌려줍니다.
+    """
+    wb = Workbook(write_only=True)
+    count = 0
+    for count, (cust_name, rows) in enumerate(receipts, start=1):
+        # 시트 이름은 31자 제한 + 중복 불가 → 순번을 앞에 붙임
+        _write_sheet(wb, f"{count:03d}_{safe_name(cust_name)}"[:31], rows)
+    if count: wb.save(save_path)
+    return count
+
+def write_receipt_folder(folder, receipts):
+    """영수증마다 파일 1개씩 folder 에 씁니다. 발행한 장 수를 돌려줍니다."""
+    os.makedirs(folder, exist_ok=True)
+    count = 0
+    for count, (cust_name, rows) in enumerate(receipts, start=1):
+        write_receipt_file(os.path.join(folder, f"{count:03d}_{safe_name(cust_name)}_영수증.xlsx"), rows)
+    return count
@@ -0,0 +1,328 @@
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from bora_db import day_numbers, to_day_number
+
+# ===========================================================
+# 🔎 [검색 엔진] 단가표를 불러올 때 한 번만 만들어 두는 인덱스
+#  - 날짜: 정수 키(1970-01-01 기준 일수)로 정렬해 두고 기간은 이진 탐색으로 잘라냄
+#  - 차종 / 혼적·합짐: 행별 비트맵(bool 배열)을 미리 계산 → 조건 결합은 OR/AND 만
+#  - 거래처 / 도착지: 글자 조각 색인 + 초성 색인 (TextIndex)
+# ===========================================================
+
+MIXED_TYPES = ("혼적", "합짐")
+
+# 최근 검색 결과를 기억해 두는 개수 (타이핑 중 앞 글자 결과를 이어서 좁히는 용도)
+QUERY_CACHE_SIZE = 64
+
+def date_key(value):
+    # '2025-03-01' / datetime / 일수 → 일수
+    return to_day_number(value)
+
+# -----------------------------------------------------------
+# [글자 색인] 거래처 / 도착지 부분 일치
+#  - 공백을 모두 빼고 대소문자를 무시한 문자열로 비교 ("군포 당정동" = "군포당정동")
+#  - 글자 1개 / 2개 조각(bigram)별로 "이 조각이 들어간 값 번호" 목록을 만들어 두고
+#    검색어의 조각 목록을 교집합 → 남은 후보만 실제로 확인 (전체 행을 훑지 않음)
+#  - 초성: 'ㄱㅍ' → 군포, '군ㅍ' 처럼 섞어 써도 됨
+# -----------------------------------------------------------
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+HANGUL_FIRST, HANGUL_LAST = 0xAC00, 0xD7A3
+CHOSUNG_SPAN = 588 # 초성 하나에 속한 완성형 글자 수 (중성 21 x 종성 28)
+
+def normalize_text(text):
+    # 모든 공백 제거 + 대소문자 무시
+    return "".join(str(text).split()).casefold()
+
+def chosung(text):
+    # 완성형 한글 → 초성, 나머지 글자는 그대로 (길이가 같아서 위치가 그대로 대응)
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if HANGUL_FIRST <= code <= HANGUL_LAST:
+            out.append(CHOSUNG[(code - HANGUL_FIRST) // CHOSUNG_SPAN])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+def has_chosung(word):
+    return any(ch in CHOSUNG for ch in word)
+
+def chosung_pattern(word):
+    # 초성 자리는 그 초성으로 시작하는 글자 전체, 나머지는 글자 그대로
+    parts = []
+    for ch in word:
+        i = CHOSUNG.find(ch)
+        if i < 0:
+            parts.append(re.escape(ch))
+        else:
+            first = HANGUL_FIRST + i * CHOSUNG_SPAN
+            parts.append(f"[{ch}{chr(first)}-{chr(first + CHOSUNG_SPAN - 1)}]")
+    return re.compile("".join(parts))
+
+# 색인을 만들 때 한 번에 배열로 바꾸는 칸 수 (값 개수 x 그 묶음에서 가장 긴 값의 글자 수).
+# 배열은 묶음의 가장 긴 값에 맞춰 채워지므로, 값을 길이순으로 묶고 칸 수로 자릅니다
+# (아주 긴 메모 하나가 섞여도 그 값이 든 작은 묶음만 넓어짐)
+INDEX_CELLS = 1_000_000
+_CHOSUNG_CODES = np.array([ord(c) for c in CHOSUNG], dtype=np.int64)
+
+def _code_matrix(texts):
+    # 문자열 목록 → (값 개수 x 최대 길이) 코드포인트 배열, 빈 자리는 0
+    arr = np.array([t or "" for t in texts])
+    if arr.dtype.itemsize == 0: return np.zeros((len(texts), 0), dtype=np.int64)
+    width = arr.dtype.itemsize // 4
+    return arr.view(np.uint32).reshape(len(texts), width).astype(np.int64)
+
+def _to_chosung_codes(m):
+    hangul = (m >= HANGUL_FIRST) & (m <= HANGUL_LAST)
+    out = m.copy()
+    out[hangul] = _CHOSUNG_CODES[(m[hangul] - HANGUL_FIRST) // CHOSUNG_SPAN]
+    return out
+
+def _gram_codes(m):
+    # 글자 1개 = 코드포인트, 연속 2글자 = 앞글자 * 2^21 + 뒷글자 (유니코드는 21비트 안)
+    uni = m
+    bi = (m[:, :-1] << 21) + m[:, 1:]
+    bi[(m[:, :-1] == 0) | (m[:, 1:] == 0)] = 0
+    return np.concatenate([uni, bi], axis=1)
+
+def _word_grams(word):
+    m = _code_matrix([word])
+    if m.shape[1] < 2: return set(m[0].tolist())
+    return set(((m[0, :-1] << 21) + m[0, 1:]).tolist())
+
+def _length_blocks(texts, cells=INDEX_CELLS):
+    # 값 번호를 길이순으로 정렬해서 (값 개수 x 가장 긴 길이) 가 cells 이하가 되게 잘라 돌려줌
+    lengths = np.fromiter((len(t) if t else 0 for t in texts), dtype=np.int64, count=len(texts))
+    order = np.argsort(lengths, kind='stable')
+    lengths = np.maximum(lengths[order], 1)
+    lo = 0
+    while lo < len(order):
+        hi = min(len(order), lo + cells // lengths[lo])
+        while hi - lo > 1 and (hi - lo) * lengths[hi - 1] > cells:
+            hi = lo + max(1, cells // lengths[hi - 1])
+        hi = max(hi, lo + 1)
+        yield order[lo:hi]
+        lo = hi
+
+def _build_postings(texts, initials=False, offset=0):
+    """조각 코드 → 그 조각이 들어간 값 번호(오름차순, 중복 없음) 배열. 값 번호는 offset 부터 시작"""
+    n = offset + len(texts)
+    gram_parts, id_parts = [], []
+    for block in _length_blocks(texts):
+        m = _code_matrix([texts[i] for i in block])
+        if initials: m = _to_chosung_codes(m)
+        g = _gram_codes(m)
+        ids = np.broadcast_to((block + offset).astype(np.int64)[:, None], g.shape)
+        used = g > 0
+        gram_parts.append(g[used]); id_parts.append(ids[used])
+    if not gram_parts: return {}
+    grams, ids = np.concatenate(gram_parts), np.concatenate(id_parts)
+    if grams.max() <= np.iinfo(np.int64).max // n:
+        # (조각, 값 번호) 를 정수 하나로 합쳐 한 번에 정렬 (보통은 이쪽)
+        keys = np.sort(grams * n + ids)
+        grams, ids = keys // n, keys % n
+    else:
+        # 값 종류가 수백만 개라 합치면 넘치는 경우: (조각, 값 번호) 순으로 정렬
+        order = np.lexsort((ids, grams))
+        grams, ids = grams[order], ids[order]
+    new_gram = np.append(True, grams[1:] != grams[:-1])
+    keep = new_gram | np.append(True, ids[1:] != ids[:-1]) # 한 값 안에 같은 조각이 여러 번 → 한 번만
+    grams, ids, new_gram = grams[keep], ids[keep], new_gram[keep]
+    starts = np.flatnonzero(new_gram)
+    ends = np.append(starts[1:], len(grams))
+    ids = ids.astype(np.int32)
+    return {int(g): ids[s:e] for g, s, e in zip(grams[starts], starts, ends)}
+
+def _extend_postings(old, new):
+    # 새 값 번호는 항상 기존 번호보다 크므로 뒤에 이어 붙여도 오름차순 유지
+    out = dict(old)
+    for g, ids in new.items():
+        out[g] = np.concatenate([old[g], ids]) if g in old else ids
+    return out
+
+class TextIndex:
+    """
+    글자 부분 일치용 색인. 행이 아니라 서로 다른 값(사전)에 대해서만 만들고
+    행 결과는 값 번호(codes)로 펼치므로, 같은 거래처가 수천 번 나와도 한 번만 확인합니다.
+    숫자/빈칸 등 문자열이 아닌 값은 기존 str.contains(na=False) 처럼 항상 불일치입니다.
+    previous 를 주면 (단가표 다시 불러오기) 그 색인의 값 사전을 이어서 쓰고
+    처음 보는 값만 새로 조각을 만듭니다.
+    """
+    def __init__(self, col, previous=None):
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            codes = col.cat.codes.to_numpy()
+            uniques = pd.Index(col.cat.categories, dtype=object)
+        else:
+            codes, uniques = pd.factorize(col)
+            uniques = pd.Index(uniques, dtype=object)
+
+        if previous is None:
+            self.values, self.codes = uniques, codes
+            self.texts = [normalize_text(u) if isinstance(u, str) else None for u in uniques]
+            self._plain = _build_postings(self.texts)
+            self._initials = _build_postings(self.texts, initials=True)
+            return
+
+        base = len(previous.values)
+        pos = previous.values.get_indexer(uniques)
+        new = np.flatnonzero(pos < 0)
+        pos[new] = base + np.arange(len(new))
+        new_texts = [normalize_text(u) if isinstance(u, str) else None for u in uniques[new]]
+
+        self.values = previous.values.append(uniques[new])
+        self.codes = np.where(codes >= 0, pos[codes], -1) if len(pos) else codes
+        self.texts = previous.texts + new_texts
+        self._plain = _extend_postings(previous._plain, _build_postings(new_texts, offset=base))
+        self._initials = _extend_postings(previous._initials, _build_postings(new_texts, initials=True, offset=base))
+
+    def _candidates(self, postings, key):
+        lists = sorted((postings.get(g) for g in _word_grams(key)), key=lambda a: -1 if a is None else len(a))
+        if lists[0] is None: return np.zeros(0, dtype=np.int32) # 없는 조각이 하나라도 있으면 불일치
+        ids = lists[0]
+        for other in lists[1:]:
+            if len(ids) == 0: break
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    def match_values(self, word):
+        """검색어(정규화된 상태) 와 일치하는 값 번호의 bool 배열"""
+        hit = np.zeros(len(self.texts), dtype=bool)
+        if has_chosung(word):
+            pattern = chosung_pattern(word)
+            ids = [i for i in self._candidates(self._initials, chosung(word)) if pattern.search(self.texts[i])]
+        else:
+            # 조각 교집합은 후보일 뿐 (조각 위치가 떨어져 있을 수 있음) → 실제 포함 여부 확인
+            ids = [i for i in self._candidates(self._plain, word) if word in self.texts[i]]
+        hit[ids] = True
+        return hit
+
+    def contains(self, word, rows=None):
+        hit = np.append(self.match_values(normalize_text(word)), False) # 코드 -1(빈칸)은 불일치
+        codes = self.codes if rows is None else self.codes[rows]
+        return hit[codes]
+
+class PriceSearchEngine:
+    def __init__(self, df, previous=None):
+        """previous: 다시 불러오기 전의 엔진 (글자 색인을 이어서 사용)"""
+        # 최신 날짜가 위로 (같은 날짜는 원래 순서 유지)
+        keys = day_numbers(df['접수일자']).astype(np.int64)
+        order = np.argsort(-keys, kind='stable')
+        self.df = df.iloc[order].reset_index(drop=True)
+        # searchsorted 는 오름차순이 필요하므로 음수로 뒤집어 보관
+        self._neg_keys = -keys[order]
+
+        # 거래처 / 도착지 글자 색인 (공백·대소문자 무시 + 초성)
+        reuse = previous is not None
+        self._cust = TextIndex(self.df['고객성명'], previous._cust if reuse else None)
+        self._dest = TextIndex(self.df['도 착 지'], previous._dest if reuse else None)
+        self._car = TextIndex(self.df['차종_최종'], previous._car if reuse else None)
+
+        # 차종별 비트맵
+        codes, uniques = pd.factorize(self.df['차종_최종'])
+        self.type_bitmaps = {t: codes == i for i, t in enumerate(uniques)}
+
+        # 도착지 또는 차종에 '혼적' / '혼적|합짐' 이 들어간 행
+        self.mixed_only = self._dest.contains("혼적") | self._car.contains("혼적")
+        self.mixed_any = self.mixed_only | self._dest.contains("합짐") | self._car.contains("합짐")
+
+        # (시작일, 종료일, 거래처, 도착지, 차종들) → 결과 행 번호
+        # 데이터를 다시 불러오면 엔진을 새로 만들므로 캐시도 같이 비워짐
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self.df)
+
+    def car_types(self):
+        # 데이터에 있는 차종 목록 (검색 필터 체크박스용)
+        return list(self.type_bitmaps)
+
+    def date_slice(self, s_date, e_date):
+        # 기간 → [lo, hi) 행 범위 (이진 탐색)
+        lo = int(np.searchsorted(self._neg_keys, -date_key(e_date), side='left'))
+        hi = int(np.searchsorted(self._neg_keys, -date_key(s_date), side='right'))
+        return lo, max(lo, hi)
+
+    def query(self, s_date, e_date, cust="", dest="", types=()):
+        """
+        조건에 맞는 행 번호(self.df 기준, 최신순)를 돌려줍니다.
+        cust/dest 는 부분 일치(공백·대소문자 무시, 초성 가능), dest 가 '혼적' 이면 혼적 건 전체,
+        types 에 혼적/합짐이 있으면 혼적·합짐 건도 함께 포함합니다.
+        이전 검색을 좁힌 조건이면 그 결과 안에서만 다시 거릅니다.
+        """
+        cust, dest = normalize_text(cust), normalize_text(dest)
+        key = (date_key(s_date), date_key(e_date), cust, dest, tuple(sorted(types)))
+        rows = self._cache.get(key)
+        if rows is not None:
+            self._cache.move_to_end(key)
+            return rows
+
+        base = self._find_narrower(key)
+        if base is not None:
+            rows = self._refine(base, key)
+        else:
+            rows = self._query_full(*key)
+
+        rows.flags.writeable = False # 캐시와 공유되므로 읽기 전용
+        self._cache[key] = rows
+        if len(self._cache) > QUERY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return rows
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _find_narrower(self, key):
+        # 새 조건의 결과가 반드시 포함되는 (가장 작은) 캐시 결과 찾기
+        s_key, e_key, cust, dest, types = key
+        best = None
+        for (c_s, c_e, c_cust, c_dest, c_types), rows in self._cache.items():
+            if c_types != types or not (c_s <= s_key and e_key <= c_e): continue
+            if c_cust not in cust: continue
+            # '혼적' 은 글자 검색이 아니라 혼적 건 전체라서 똑같을 때만 재사용
+            if "혼적" in (dest, c_dest) and dest != c_dest: continue
+            if c_dest not in dest: continue
+            if best is None or len(rows) < len(best[1]):
+                best = ((c_cust, c_dest), rows)
+        return best
+
+    def _refine(self, base, key):
+        (c_cust, c_dest), rows = base
+        s_key, e_key, cust, dest, _ = key
+        day = -self._neg_keys[rows]
+        rows = rows[(day >= s_key) & (day <= e_key)]
+        if cust != c_cust and len(rows):
+            rows = rows[self._cust.contains(cust, rows)]
+        if dest != c_dest and len(rows):
+            rows = rows[self._dest.contains(dest, rows)]
+        return rows
+
+    def _query_full(self, s_key, e_key, cust, dest, types):
+        lo, hi = self.date_slice(s_key, e_key)
+        mask = np.ones(hi - lo, dtype=bool)
+
+        if types:
+            type_mask = np.zeros(hi - lo, dtype=bool)
+            for t in types:
+                bm = self.type_bitmaps.get(t)
+                if bm is not None: type_mask |= bm[lo:hi]
+            if any(t in MIXED_TYPES for t in types):
+                type_mask |= self.mixed_any[lo:hi]
+            mask &= type_mask
+
+        if dest == "혼적":
+            mask &= self.mixed_only[lo:hi]
+
+        rows = lo + np.flatnonzero(mask)
+        # 글자 조건은 앞 조건으로 줄어든 행에만 적용
+        if cust and len(rows):
+            rows = rows[self._cust.contains(cust, rows)]
+        if dest and dest != "혼적" and len(rows):
+            rows = rows[self._dest.contains(dest, rows)]
+        return rows
+
+    def rows(self, positions):
+        return self.df.iloc[positions]
@@ -0,0 +1,319 @@
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import threading
+import http.client
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, urlencode, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from bora_db import DB_NAME, PRICE_COLS, load_price_table
+from bora_search import PriceSearchEngine
+from bora_stats import load_fare_stats
+from bora_pricing import quote, quote_batch
+from bora_watch import DbWatcher, row_changes
+from bora_perf import span, record, set_log_tag
+
+# ===========================================================
+# 🖥️ [단가표 공유 서버] 사무실에 한 대만 켜 두면
+# 단가표 / 검색 인덱스 / 운임 통계를 그 PC 메모리에만 올리고,
+# 배차 PC 의 계산기는 HTTP(JSON) 로 검색/견적만 요청합니다.
+#   python bora_server.py                       → 이 PC 에서만 (127.0.0.1:8787)
+#   python bora_server.py --host 0.0.0.0        → 사무실 다른 PC 에서도 접속
+#   python bora_calc.py --server http://서버PC주소:8787   (또는 환경변수 BORA_SERVER)
+# ===========================================================
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8787
+SERVER_ENV = 'BORA_SERVER'
+
+# 요청 본문 최대 크기 (견적 일괄 요청도 이 안에 들어감)
+MAX_BODY = 10 * 1024 * 1024
+# 다시 불러오기 뒤에도 이전 검색 결과의 행 번호를 이만큼의 이전 버전까지 받아줌
+KEEP_VERSIONS = 2
+CLIENT_TIMEOUT = 10
+
+# -----------------------------------------------------------
+# [주고받는 형식] 행 번호 목록은 int32 바이트를 base64 로 (수십만 건도 작게)
+# -----------------------------------------------------------
+def encode_positions(positions):
+    return base64.b64encode(np.asarray(positions, dtype='<i4').tobytes()).decode('ascii')
+
+def decode_positions(text):
+    return np.frombuffer(base64.b64decode(text), dtype='<i4').astype(np.int64)
+
+def _json_values(col):
+    # numpy 값 / NaN → JSON 으로 보낼 수 있는 값
+    return col.astype(object).where(col.notna(), None).tolist()
+
+def rows_payload(df):
+    out = {'접수일자': df['접수일자'].to_numpy(dtype=np.int64).tolist()}
+    for c in PRICE_COLS[1:]:
+        out[c] = _json_values(df[c])
+    return out
+
+def rows_frame(payload):
+    return pd.DataFrame({c: payload[c] for c in PRICE_COLS}, columns=PRICE_COLS)
+
+class StaleVersion(Exception):
+    """서버가 단가표를 다시 불러와서 예전 검색 결과의 행 번호를 더 이상 쓸 수 없음"""
+
+# 서버 요청이 실패했을 때 클라이언트에서 나는 오류 (연결 끊김 / 시간 초과 / 서버 오류 응답)
+REQUEST_ERRORS = (OSError, http.client.HTTPException, RuntimeError)
+
+# -----------------------------------------------------------
+# [서버]
+# -----------------------------------------------------------
+class PriceService:
+    """단가표 + 검색 엔진 + 운임 통계를 한 번만 올려두고 요청에 답합니다."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock() # 검색 캐시(OrderedDict)는 여러 요청이 동시에 건드리면 안 됨
+        self._engines = OrderedDict() # 버전 → 엔진 (최근 KEEP_VERSIONS 개)
+        self.version = 0
+        with span('server.load') as sp:
+            df, self.source = load_price_table(db_path, compact=True)
+            sp['rows'] = len(df)
+        engine = PriceSearchEngine(df)
+        fare_stats, _ = load_fare_stats(db_path, engine.df)
+        self._install(engine, fare_stats)
+
+    def _install(self, engine, fare_stats):
+        with self._lock:
+            self.version += 1
+            self.engine, self.fare_stats = engine, fare_stats
+            self.loaded_at = time.strftime('%Y-%m-%d %H:%M:%S')
+            self._engines[self.version] = engine
+            while len(self._engines) > KEEP_VERSIONS:
+                self._engines.popitem(last=False)
+
+    # 단가표 감시 (bora_watch) 용 ---------------------------
+    def reload_data(self):
+        df, source = load_price_table(self.db_path, compact=True)
+        added, removed = row_changes(self.engine.df, df)
+        if not added and not removed: return None
+        engine = PriceSearchEngine(df, previous=self.engine)
+        fare_stats, _ = load_fare_stats(self.db_path, engine.df)
+        return engine, fare_stats, source, added, removed
+
+    def on_reloaded(self, result):
+        engine, fare_stats, self.source, added, removed = result
+        self._install(engine, fare_stats)
+        print(f"🔄 단가표 갱신 (버전 {self.version}): 새 행 {added:,}건 / 없어진 행 {removed:,}건")
+
+    # 요청 처리 --------------------------------------------
+    def info(self):
+        return {'version': self.version, 'rows': len(self.engine), 'source': self.source,
+                'loaded_at': self.loaded_at, 'types': self.engine.car_types()}
+
+    def search(self, req):
+        with self._lock:
+            version, engine = self.version, self.engine
+            rows = engine.query(req['start'], req['end'], req.get('cust', ""), req.get('dest', ""), req.get('types', []))
+        return {'version': version, 'total': len(rows), 'positions': encode_positions(rows)}
+
+    def rows(self, req):
+        engine = self._engines.get(req['version'])
+        if engine is None:
+            raise StaleVersion(req['version'])
+        return rows_payload(engine.rows(decode_positions(req['positions'])))
+
+    def stats(self, cust, dest, car_type):
+        return self.fare_stats.lookup(cust, dest, car_type)
+
+    def quote(self, req):
+        return quote(**req)
+
+    def quote_batch(self, req):
+        return quote_batch(**req).to_dict(orient='list')
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # 연결 유지(keep-alive) - 요청마다 새로 접속하지 않음
+    disable_nagle_algorithm = True # 헤더/본문을 따로 보내도 지연(약 40ms) 없이 바로 전송
+    service = None
+
+    def log_message(self, fmt, *args):
+        pass # 요청마다 화면에 찍지 않음 (시간은 bora_perf 로그에)
+
+    def _send_json(self, code, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection: self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY:
+            # 본문을 읽지 않고 답하므로 남은 바이트가 다음 요청으로 읽히지 않게 연결을 끊음
+            self.close_connection = True
+            raise ValueError("요청이 너무 큽니다" if length > MAX_BODY else "요청 길이가 잘못되었습니다")
+        data = self.rfile.read(length)
+        if len(data) < length: self.close_connection = True # 보내다 끊긴 요청
+        return json.loads(data or b'{}')
+
+    def _handle(self, method):
+        started = time.perf_counter()
+        url = urlparse(self.path)
+        try:
+            # 본문은 항상 먼저 다 읽어야 같은 연결로 다음 요청을 받을 수 있음
+            body = self._read_json() if method == 'POST' else None
+            if method == 'GET' and url.path == '/info':
+                result = self.service.info()
+            elif method == 'GET' and url.path == '/stats':
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                result = self.service.stats(q.get('cust', ""), q.get('dest', ""), q.get('type', ""))
+            elif method == 'POST' and url.path in ('/search', '/rows', '/quote', '/quote_batch'):
+                result = getattr(self.service, url.path[1:])(body)
+            else:
+                self._send_json(404, {'error': f"없는 주소: {method} {url.path}"})
+                return
+        except StaleVersion as e:
+            self._send_json(409, {'error': f"단가표가 갱신되었습니다 (버전 {e})"})
+            return
+        except Exception as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(200, result)
+        record(f"server{url.path}", (time.perf_counter() - started) * 1000)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+def serve(db_path, host=DEFAULT_HOST, port=DEFAULT_PORT, watch=True):
+    service = PriceService(db_path)
+    handler = type('Handler', (ServiceHandler,), {'service': service})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    if watch:
+        DbWatcher(None, db_path, service.reload_data, service.on_reloaded).start()
+    print(f"🖥️ 단가표 서버 시작: http://{host}:{port}  ({len(service.engine):,}행, 버전 {service.version})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 서버 종료")
+    finally:
+        httpd.server_close()
+
+# -----------------------------------------------------------
+# [클라이언트] 계산기가 PriceSearchEngine / FareStats 대신 쓰는 얇은 껍데기
+# -----------------------------------------------------------
+class ServiceClient:
+    """스레드마다 연결 하나를 유지 (검색 작업 스레드 / 화면 스레드)"""
+
+    def __init__(self, base_url, timeout=CLIENT_TIMEOUT):
+        u = urlparse(base_url if '://' in base_url else f"http://{base_url}")
+        self.host, self.port = u.hostname, u.port or DEFAULT_PORT
+        self.base_url = f"http://{self.host}:{self.port}"
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, body=None):
+        data = None if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json'} if data is not None else {}
+        for attempt in range(2):
+            conn = self._conn()
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                payload = json.loads(resp.read() or b'null')
+                break
+            except (http.client.HTTPException, ConnectionError, OSError):
+                # 서버가 쉬고 있던 연결을 끊었으면 한 번만 다시 접속
+                conn.close()
+                self._local.conn = None
+                if attempt: raise
+        if resp.status == 409:
+            raise StaleVersion(payload.get('error'))
+        if resp.status != 200:
+            raise RuntimeError(payload.get('error') if isinstance(payload, dict) else resp.reason)
+        return payload
+
+class RemoteEngine:
+    """
+    PriceSearchEngine 처럼 query / rows / car_types 를 서버에 물어봐서 처리합니다.
+    단, 행 번호는 서버 단가표 버전마다 달라지므로 query 는 (버전, 행 번호) 를 돌려주고
+    rows 에는 그 버전을 같이 넘겨야 합니다 (그 사이 서버가 갱신됐으면 StaleVersion).
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.source = f"server:{client.base_url}"
+        self.refresh()
+
+    def refresh(self):
+        # 서버의 최신 버전 / 행 수 / 차종 목록
+        info = self.client.request('GET', '/info')
+        self.version, self.total, self.types = info['version'], info['rows'], info['types']
+
+    def __len__(self):
+        return self.total
+
+    def car_types(self):
+        return list(self.types)
+
+    def query(self, s_date, e_date, cust="", dest="", types=()):
+        res = self.client.request('POST', '/search', {'start': s_date, 'end': e_date, 'cust': cust, 'dest': dest,
+                                                      'types': list(types)})
+        # 서버가 단가표를 다시 불러왔으면 차종 목록 등도 새로
+        if res['version'] != self.version:
+            self.refresh()
+        # 행 번호는 이 버전의 단가표 기준 → rows() 요청에 같이 보냄
+        return res['version'], decode_positions(res['positions'])
+
+    def rows(self, positions, version):
+        res = self.client.request('POST', '/rows', {'version': version, 'positions': encode_positions(positions)})
+        return rows_frame(res)
+
+class RemoteFareStats:
+    def __init__(self, client):
+        self.client = client
+
+    def lookup(self, cust_name, dest_name, car_type):
+        q = urlencode({'cust': "" if cust_name is None else str(cust_name),
+                       'dest': "" if dest_name is None else str(dest_name), 'type': str(car_type)})
+        return self.client.request('GET', f"/stats?{q}")
+
+def connect(base_url):
+    # (엔진, 운임 통계) - 서버에 연결이 안 되면 예외
+    client = ServiceClient(base_url)
+    return RemoteEngine(client), RemoteFareStats(client)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="보라물류 단가표 공유 서버")
+    parser.add_argument('--db', help="단가표 엑셀 경로 (기본: 바탕화면의 통합 단가표)")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="0.0.0.0 이면 사무실 다른 PC 에서도 접속 가능")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--no-watch', action='store_true', help="단가표 파일 변경 감시 끄기")
+    args = parser.parse_args(argv)
+
+    db_path = args.db
+    if not db_path:
+        from bora_merge import get_base_path
+        db_path = os.path.join(get_base_path(), DB_NAME)
+    serve(db_path, args.host, args.port, watch=not args.no_watch)
+
+if __name__ == "__main__":
+    set_log_tag('bora_server')
+    sys.exit(main())
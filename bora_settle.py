@@ -0,0 +1,177 @@
+import os
+import re
+import sys
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+from bora_db import DB_NAME, load_price_table, day_numbers, day_text, to_day_number
+from bora_stats import customer_keys
+from bora_pricing import quote_batch
+from bora_receipt import get_receipt_dir, safe_name
+from bora_perf import span, set_log_tag, maybe_start_profile
+
+# ===========================================================
+# 🧮 [월말 정산] 손으로 행을 뽑아 엑셀에서 더하던 작업을 한 번에
+#   python bora_settle.py 2025-10                   → 2025년 10월
+#   python bora_settle.py 2025                      → 2025년 전체 (월별로 나눠서)
+#   python bora_settle.py --start 2025-01-01 --end 2025-03-31 --cust 삼성
+# 정리된 단가표 → 기간 필터 → 견적 규칙(bora_pricing)으로 공급가액/부가세 한 번에 계산
+# → (거래처, 월, 차종) 별 합계 → 보고서 엑셀 1개 (스트리밍 쓰기)
+# ===========================================================
+
+# 보고서 금액 항목 (건별로 계산한 뒤 더함 → 영수증 금액의 합과 같음)
+AMOUNT_COLS = ['공급가액', '부가세', '최종청구금액']
+SUMMARY_COLS = ['거래처', '정산월', '건수'] + AMOUNT_COLS
+DETAIL_COLS = ['거래처', '정산월', '차종', '건수'] + AMOUNT_COLS
+
+MONEY_FORMAT = '#,##0'
+
+def parse_period(text):
+    """'2025-10' → 그 달, '2025' → 그 해. (시작 일수, 끝 일수) 를 돌려줍니다. 형식이 틀리면 ValueError."""
+    text = str(text).strip()
+    if not re.fullmatch(r'\d{4}(-\d{2})?', text) or (len(text) == 7 and not 1 <= int(text[5:]) <= 12):
+        raise ValueError(f"정산 기간 형식이 잘못되었습니다: '{text}' (예: 2025-10 또는 2025)")
+    unit = 'M' if '-' in text else 'Y'
+    first = np.datetime64(text, unit)
+    start = first.astype('datetime64[D]')
+    end = (first + 1).astype('datetime64[D]') - 1
+    return int(start.astype(np.int64)), int(end.astype(np.int64))
+
+def parse_day(text):
+    # 'YYYY-MM-DD' → 일수 (형식이 틀리거나 없는 날짜면 ValueError)
+    text = str(text).strip()
+    try:
+        if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', text): raise ValueError
+        return to_day_number(text)
+    except ValueError:
+        raise ValueError(f"날짜 형식이 잘못되었습니다: '{text}' (예: 2025-01-31)") from None
+
+def month_text(months):
+    # 1970-01 기준 월 번호 → 'YYYY-MM'
+    return np.datetime_as_string(np.asarray(months, dtype=np.int64).astype('datetime64[M]'), unit='M').astype(object)
+
+def build_settlement(df, start_day, end_day, cust="", with_vat=True):
+    """
+    정리된 단가표(압축 / 예전 형식 모두) → (거래처별 월 합계, 거래처·월·차종별 합계).
+    운임은 건마다 bora_pricing 규칙으로 공급가액/부가세를 계산한 뒤 더합니다.
+    """
+    days = day_numbers(df['접수일자']).astype(np.int64)
+    mask = (days >= start_day) & (days <= end_day)
+    custs = customer_keys(df['고객성명'][mask])
+    if cust:
+        hit = custs.str.replace(' ', '').str.upper().str.contains(str(cust).replace(' ', '').upper(), regex=False)
+        custs = custs[hit]
+        mask[mask] = hit.to_numpy()
+    rows = df[mask]
+
+    with span('settle.quote', rows=len(rows)):
+        # 단가표에는 기본 운임만 있음 → 할증 없이 공급가액 = 기본 운임, 부가세는 건별 10% 버림
+        quotes = quote_batch(pd.to_numeric(rows['배달운임'], errors='coerce').fillna(0).to_numpy(dtype=np.int64),
+                             with_vat=with_vat)
+
+    with span('settle.group', rows=len(rows)) as sp:
+        months = days[mask].astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        frame = pd.DataFrame({
+            '거래처': custs.to_numpy(),
+            '정산월': months,
+            '차종': rows['차종_최종'].astype(str).to_numpy(),
+            '건수': np.ones(len(rows), dtype=np.int64),
+        })
+        for c in AMOUNT_COLS:
+            frame[c] = quotes[c].to_numpy()
+
+        detail = frame.groupby(['거래처', '정산월', '차종'], sort=True).sum().reset_index()
+        summary = detail.groupby(['거래처', '정산월'], sort=True)[['건수'] + AMOUNT_COLS].sum().reset_index()
+        detail['정산월'] = month_text(detail['정산월'])
+        summary['정산월'] = month_text(summary['정산월'])
+        sp['groups'] = len(detail)
+    return summary[SUMMARY_COLS], detail[DETAIL_COLS]
+
+def _sheet_rows(ws, table, money_cols):
+    # DataFrame → 시트 (금액 칸은 천 단위 쉼표). 컬럼별로 파이썬 값으로 바꿔서 한 줄씩 씀
+    cols = list(table.columns)
+    money = [c in money_cols for c in cols]
+    for values in zip(*(table[c].tolist() for c in cols)):
+        ws.append([_money_cell(ws, v) if m else v for v, m in zip(values, money)])
+
+def _money_cell(ws, value):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.number_format = MONEY_FORMAT
+    return cell
+
+def write_settlement(save_path, summary, detail, title):
+    """
+    보고서 엑셀 1개: '거래처별 합계' / '차종별 내역' 시트.
+    write_only(스트리밍) 모드라 행이 많아도 메모리가 늘지 않습니다.
+    """
+    money_cols = ['건수'] + AMOUNT_COLS
+    wb = Workbook(write_only=True)
+    for sheet_name, table in (("거래처별 합계", summary), ("차종별 내역", detail)):
+        ws = wb.create_sheet(title=sheet_name)
+        ws.append([title])
+        ws.append([])
+        ws.append(list(table.columns))
+        _sheet_rows(ws, table, money_cols)
+        totals = [int(table[c].sum()) for c in money_cols]
+        ws.append(['총 합계'] + [''] * (len(table.columns) - len(money_cols) - 1) + [_money_cell(ws, v) for v in totals])
+    wb.save(save_path)
+    return save_path
+
+def run_settlement(db_path, start_day, end_day, cust="", with_vat=True, out_path=None):
+    with span('settle.load') as sp:
+        df, sp['source'] = load_price_table(db_path, compact=True)
+    summary, detail = build_settlement(df, start_day, end_day, cust, with_vat)
+
+    period = f"{day_text([start_day])[0]} ~ {day_text([end_day])[0]}"
+    title = f"보라물류 월말 정산 ({period}{', 거래처: ' + cust if cust else ''}{'' if with_vat else ', 부가세 없음'})"
+    if out_path is None:
+        stamp = datetime.now().strftime('%Y%m%d_%H%M')
+        label = f"{day_text([start_day])[0]}_{day_text([end_day])[0]}" + (f"_{safe_name(cust)}" if cust else "")
+        out_path = os.path.join(get_receipt_dir(), f"{stamp}_월말정산_{label}.xlsx")
+    with span('settle.write', groups=len(detail)):
+        write_settlement(out_path, summary, detail, title)
+
+    print(f"🧮 정산 완료: 거래처 {summary['거래처'].nunique():,}곳 / {int(summary['건수'].sum()):,}건"
+          f" / 총 청구 {int(summary['최종청구금액'].sum()):,}원")
+    print(f"📄 저장: {out_path}")
+    return out_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="보라물류 월말 정산 보고서")
+    parser.add_argument('period', nargs='?', help="정산 기간: 2025-10 (한 달) 또는 2025 (한 해). 생략하면 지난달")
+    parser.add_argument('--start', help="시작일 (YYYY-MM-DD) - period 대신")
+    parser.add_argument('--end', help="종료일 (YYYY-MM-DD) - period 대신")
+    parser.add_argument('--cust', default="", help="거래처명 일부 (생략하면 전체 거래처)")
+    parser.add_argument('--no-vat', action='store_true', help="부가세 없이 정산")
+    parser.add_argument('--db', help="단가표 엑셀 경로 (기본: 바탕화면의 통합 단가표)")
+    parser.add_argument('--out', help="보고서 저장 경로 (기본: 바탕화면)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.start or args.end:
+            if not (args.start and args.end): parser.error("--start 와 --end 를 함께 지정하세요")
+            start_day, end_day = parse_day(args.start), parse_day(args.end)
+            if start_day > end_day: parser.error("--start 가 --end 보다 늦습니다")
+        elif args.period:
+            start_day, end_day = parse_period(args.period)
+        else:
+            this_month = np.datetime64(datetime.now().strftime('%Y-%m'), 'M')
+            start_day, end_day = parse_period(str(this_month - 1))
+    except ValueError as e:
+        parser.error(str(e))
+
+    db_path = args.db
+    if not db_path:
+        from bora_merge import get_base_path
+        db_path = os.path.join(get_base_path(), DB_NAME)
+    run_settlement(db_path, start_day, end_day, args.cust, not args.no_vat, args.out)
+
+if __name__ == "__main__":
+    set_log_tag('bora_settle')
+    maybe_start_profile('bora_settle')
+    sys.exit(main())
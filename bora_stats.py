@@ -0,0 +1,185 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from bora_classify import normalize_dest
+from bora_db import parse_dates, day_numbers, day_text, source_stamp
+
+# ===========================================================
+# 📊 [과거 운임 통계] (거래처, 도착지, 차종) 별 건수 / 최저 / 중간 / 최고 / 최근 운임
+# 병합할 때 연도 파일마다 "운임별 건수" 조각을 만들어 캐시해 두고,
+# 바뀐 파일의 조각만 새로 만든 뒤 전체 조각을 합쳐서 통계를 냅니다.
+# 계산기는 통계 파일을 읽어 dict 로 바로 찾습니다 (이력 전체를 다시 훑지 않음).
+# ===========================================================
+
+# 저장 형식이 바뀌면 올려서 예전 파일을 무시하게 함
+STATS_VERSION = 2
+
+KEY_COLS = ['고객성명', '도착지키', '차종_최종']
+STATS_COLS = ['건수', '최저', '중간', '최고', '최근운임', '최근일자']
+
+def stats_path(db_path):
+    return os.path.splitext(db_path)[0] + '_stats.pkl'
+
+def dest_key(text):
+    # 도착지 1건의 키 (normalize_dest 와 같은 규칙: 공백 제거 + 대문자)
+    if text is None or pd.isna(text): return ""
+    return str(text).replace(' ', '').upper()
+
+def customer_keys(col):
+    # 거래처명 키: 빈칸은 "", 앞뒤 공백 제거
+    return col.astype(object).where(col.notna(), "").astype(str).str.strip()
+
+def stats_key(cust_name, dest_name, car_type):
+    cust = "" if cust_name is None or pd.isna(cust_name) else str(cust_name).strip()
+    return cust, dest_key(dest_name), str(car_type)
+
+# -----------------------------------------------------------
+# [조각] 키 + 운임별 (건수, 가장 최근 일수) → 파일끼리 더해서 합칠 수 있음
+# -----------------------------------------------------------
+def fare_counts(df):
+    """
+    병합 결과(yy/mm/dd 문자열) / 정리된 단가표(일수) 어느 쪽이든 받아서
+    (고객성명, 도착지키, 차종_최종, 배달운임) 별 건수와 최근 일수를 돌려줍니다.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=KEY_COLS + ['배달운임', '건수', '최근일수'])
+    if pd.api.types.is_integer_dtype(df['접수일자']):
+        days = df['접수일자'].to_numpy(dtype=np.int64)
+        valid = np.ones(len(df), dtype=bool)
+    else:
+        dates = parse_dates(df['접수일자'])
+        valid = dates.notna().to_numpy()
+        days = day_numbers(dates.fillna(pd.Timestamp(0))).astype(np.int64)
+    fares = pd.to_numeric(df['배달운임'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+    keys, _ = normalize_dest(df['도 착 지'])
+    part = pd.DataFrame({
+        '고객성명': customer_keys(df['고객성명']).to_numpy(),
+        '도착지키': keys.fillna("").to_numpy(),
+        '차종_최종': df['차종_최종'].astype(str).to_numpy(),
+        '배달운임': fares,
+        '최근일수': days,
+    })
+    part = part[valid] # 날짜를 못 읽은 행은 제외
+    return combine_counts([part.assign(건수=1)])
+
+def combine_counts(parts):
+    # 여러 조각 → 하나로 (건수는 더하고 최근 일수는 큰 쪽)
+    parts = [p for p in parts if p is not None and not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=KEY_COLS + ['배달운임', '건수', '최근일수'])
+    merged = pd.concat(parts, ignore_index=True)
+    out = merged.groupby(KEY_COLS + ['배달운임'], sort=False).agg(건수=('건수', 'sum'), 최근일수=('최근일수', 'max'))
+    return out[out['건수'] > 0].reset_index()
+
+def subtract_counts(counts, removed):
+    """
+    중복으로 빠진 행(removed 조각)만큼 건수를 뺍니다.
+    빠진 행과 날짜/운임이 똑같은 행이 다른 파일에 남아 있으므로 최근 일수는 그대로 맞습니다.
+    """
+    if removed.empty: return counts
+    return combine_counts([counts, removed.assign(건수=-removed['건수'])])
+
+# -----------------------------------------------------------
+# [통계] 조각 → 키별 한 줄
+# -----------------------------------------------------------
+def summarize(counts):
+    """
+    키별 통계 DataFrame (인덱스 = KEY_COLS, 컬럼 = STATS_COLS).
+    중간값은 pandas median 과 같이 짝수 건이면 가운데 두 값의 평균(원 단위 버림)입니다.
+    최근운임은 가장 최근 날짜의 운임 (같은 날 여러 금액이면 그중 높은 금액).
+    """
+    if counts.empty:
+        return pd.DataFrame(columns=STATS_COLS, index=pd.MultiIndex.from_tuples([], names=KEY_COLS))
+
+    c = counts.sort_values(KEY_COLS + ['배달운임'], kind='stable').reset_index(drop=True)
+    g = c.groupby(KEY_COLS, sort=False)
+    gid = g.ngroup().to_numpy()
+    n = c['건수'].to_numpy(dtype=np.int64)
+    fare = c['배달운임'].to_numpy(dtype=np.int64)
+
+    # 운임 오름차순으로 건수를 누적 → 각 줄이 차지하는 순번 구간 [start, end)
+    end = g['건수'].cumsum().to_numpy(dtype=np.int64)
+    start = end - n
+    total = g['건수'].transform('sum').to_numpy(dtype=np.int64)
+    lo, hi = (total - 1) // 2, total // 2
+    n_groups = gid.max() + 1
+    lo_val = np.zeros(n_groups, dtype=np.int64)
+    hi_val = np.zeros(n_groups, dtype=np.int64)
+    m = (start <= lo) & (lo < end); lo_val[gid[m]] = fare[m]
+    m = (start <= hi) & (hi < end); hi_val[gid[m]] = fare[m]
+
+    # 최근 날짜가 같으면 운임이 큰 줄이 뒤에 오도록 정렬해서 마지막 줄 선택
+    latest = c.assign(_gid=gid).sort_values(['_gid', '최근일수', '배달운임'], kind='stable').groupby('_gid').tail(1)
+
+    keys = g.head(1)[KEY_COLS]
+    out = pd.DataFrame({
+        '건수': np.bincount(gid, weights=n).astype(np.int64),
+        '최저': g['배달운임'].min().to_numpy(dtype=np.int64),
+        '중간': (lo_val + hi_val) // 2,
+        '최고': g['배달운임'].max().to_numpy(dtype=np.int64),
+        '최근운임': latest['배달운임'].to_numpy(dtype=np.int64),
+        '최근일자': latest['최근일수'].to_numpy(dtype=np.int64),
+    }, columns=STATS_COLS)
+    out.index = pd.MultiIndex.from_frame(keys)
+    return out
+
+# -----------------------------------------------------------
+# [저장 / 불러오기]
+# -----------------------------------------------------------
+def save_fare_stats(counts, db_path):
+    payload = {'version': STATS_VERSION, 'source': source_stamp(db_path), 'stats': summarize(counts)}
+    out_p = stats_path(db_path)
+    with open(out_p + '.tmp', 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(out_p + '.tmp', out_p)
+    return out_p
+
+def is_fare_stats_fresh(db_path):
+    return _read_fare_stats(db_path) is not None
+
+def _read_fare_stats(db_path):
+    try:
+        with open(stats_path(db_path), 'rb') as f:
+            payload = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(payload, dict) or payload.get('version') != STATS_VERSION:
+        return None
+    current = source_stamp(db_path)
+    if current is not None and payload.get('source') != current:
+        return None
+    return payload['stats']
+
+class FareStats:
+    """(거래처, 도착지, 차종) → 통계 dict 를 O(1) 로 찾는 표"""
+
+    def __init__(self, stats):
+        self.stats = stats
+        values = stats[STATS_COLS].to_numpy(dtype=np.int64).tolist()
+        self._table = dict(zip(stats.index, values))
+
+    def __len__(self):
+        return len(self._table)
+
+    def lookup(self, cust_name, dest_name, car_type):
+        row = self._table.get(stats_key(cust_name, dest_name, car_type))
+        if row is None: return None
+        out = dict(zip(STATS_COLS, row))
+        out['최근일자'] = day_text([row[-1]])[0]
+        return out
+
+def load_fare_stats(db_path, df=None):
+    """
+    통계 파일이 최신이면 그걸, 아니면 이미 불러온 단가표(df)에서 바로 계산합니다.
+    (FareStats, 출처) 를 돌려줍니다. 출처는 'file' / 'table' / None(데이터 없음).
+    """
+    stats = _read_fare_stats(db_path)
+    if stats is not None:
+        return FareStats(stats), 'file'
+    if df is None or df.empty:
+        return FareStats(summarize(combine_counts([]))), None
+    return FareStats(summarize(fare_counts(df))), 'table'
@@ -0,0 +1,180 @@
+import os
+import json
+import queue
+import threading
+import time
+import urllib.request
+import urllib.error
+
+from bora_perf import span
+
+# ===========================================================
+# 🔄 [자동 업데이트 시스템] - 형님의 깃허브와 연동됨
+# 창을 먼저 띄우고, 버전 확인은 뒤에서 짧은 제한시간 안에만 합니다.
+# ===========================================================
+GITHUB_USER = "DaonMaru"
+REPO_NAME = "BoraSystem"
+BRANCH = "main"
+BASE_URL = f"https://raw.githubusercontent.com/{GITHUB_USER}/{REPO_NAME}/{BRANCH}"
+
+# 업데이트 때 바탕화면으로 받아오는 통합 엔진 파일들 (bora_merge.py 가 import 하는 모듈 포함)
+UPDATE_FILES = ['bora_merge.py', 'bora_classify.py', 'bora_db.py', 'bora_perf.py', 'bora_stats.py']
+
+# 요청 1건당 제한시간(초) / 전체 확인 작업 제한시간(초)
+REQUEST_TIMEOUT = 3
+CHECK_DEADLINE = 15
+# 마감 직전에 끝난 결과를 화면 쪽이 받을 수 있게 기다려 주는 여유(초) - 교체는 로컬 파일 쓰기라 금방 끝남
+RESULT_GRACE = 1
+
+# 서버 version.txt 의 ETag / Last-Modified 를 기억해 두는 파일
+STATE_NAME = '.bora_update.json'
+
+def get_desktop_path():
+    user_profile = os.environ['USERPROFILE']
+    # 원드라이브 우선, 없으면 바탕화면
+    desktop_path = os.path.join(user_profile, 'OneDrive', '바탕 화면')
+    if not os.path.exists(desktop_path):
+        desktop_path = os.path.join(user_profile, 'Desktop')
+    return desktop_path
+
+def _load_state(state_p):
+    try:
+        with open(state_p, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _save_state(state_p, state):
+    try:
+        with open(state_p, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+    except Exception:
+        pass # 다음에 다시 전체 요청하면 그만
+
+def fetch_server_version(base_url, state_p, timeout=REQUEST_TIMEOUT):
+    """
+    서버 version.txt 를 조건부 요청(If-None-Match / If-Modified-Since)으로 확인합니다.
+    바뀌지 않았으면 서버는 304 만 돌려주고, 기억해 둔 버전을 그대로 씁니다.
+    """
+    state = _load_state(state_p)
+    req = urllib.request.Request(f"{base_url}/version.txt")
+    if state.get('server_ver') is not None:
+        if state.get('etag'): req.add_header('If-None-Match', state['etag'])
+        if state.get('last_modified'): req.add_header('If-Modified-Since', state['last_modified'])
+
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            server_ver = float(response.read().decode('utf-8').strip())
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return float(state['server_ver'])
+        raise
+
+    _save_state(state_p, {
+        'server_ver': server_ver,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+    })
+    return server_ver
+
+def _request_timeout(timeout, deadline):
+    # 요청 1건 제한시간 = min(기본 제한시간, 마감까지 남은 시간). 이미 마감이 지났으면 TimeoutError
+    if deadline is None: return timeout
+    left = deadline - time.monotonic()
+    if left <= 0: raise TimeoutError("업데이트 확인 제한시간이 지났습니다")
+    return min(timeout, left)
+
+def check_and_update(base_url=BASE_URL, desktop_path=None, timeout=REQUEST_TIMEOUT, deadline=None):
+    """
+    서버(깃허브)의 version.txt를 확인하고,
+    내 컴퓨터보다 최신 버전이면 bora_merge.py(와 관련 모듈)를 다운로드합니다.
+    (업데이트 여부, 서버 버전) 을 돌려줍니다.
+    deadline (time.monotonic 기준 시각) 을 주면 각 요청은 남은 시간만 쓰고,
+    마감이 지나면 파일을 바꾸지 않고 그만둡니다 (화면은 이미 결과를 버렸으므로).
+    """
+    try:
+        # 1. 경로 설정
+        desktop_path = desktop_path or get_desktop_path()
+        local_ver_file = os.path.join(desktop_path, 'version.txt')
+
+        # 2. 내 컴퓨터 버전 확인 (없으면 0.0으로 간주)
+        current_ver = 0.0
+        if os.path.exists(local_ver_file):
+            try:
+                with open(local_ver_file, 'r') as f:
+                    current_ver = float(f.read().strip())
+            except:
+                pass # 파일이 깨져있으면 0.0
+
+        # 3. 서버(깃허브) 버전 확인
+        server_ver = fetch_server_version(base_url, os.path.join(desktop_path, STATE_NAME),
+                                          _request_timeout(timeout, deadline))
+
+        print(f"📡 버전 확인 - 내PC: {current_ver} / 서버: {server_ver}")
+
+        # 4. 업데이트 진행 (서버 버전이 더 높으면)
+        if server_ver > current_ver:
+            print("🚀 업데이트 발견! 다운로드를 시작합니다...")
+
+            # (1) 전부 받은 다음에 한꺼번에 교체 (중간에 끊겨도 반쪽 파일이 남지 않게)
+            downloaded = {}
+            for code_name in UPDATE_FILES:
+                with urllib.request.urlopen(f"{base_url}/{code_name}",
+                                            timeout=_request_timeout(timeout, deadline)) as response:
+                    downloaded[code_name] = response.read().decode('utf-8')
+
+            # 받는 도중 마감이 지났으면 교체하지 않음 (다음 실행 때 다시 받음)
+            _request_timeout(timeout, deadline)
+
+            for code_name, code_data in downloaded.items():
+                target_p = os.path.join(desktop_path, code_name)
+                with open(target_p + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(code_data)
+                os.replace(target_p + '.tmp', target_p)
+
+            # (2) 로컬 version.txt 업데이트
+            with open(local_ver_file, 'w') as f:
+                f.write(str(server_ver))
+
+            return True, server_ver # 업데이트 성공했다는 신호
+
+    except Exception as e:
+        print(f"⚠️ 업데이트 확인 중 오류: {e}")
+        return False, 0.0
+
+    return False, 0.0 # 업데이트 없음
+
+def start_update_check(root, on_done, deadline=CHECK_DEADLINE, poll_ms=200, **kwargs):
+    """
+    업데이트 확인을 백그라운드 스레드에서 실행하고,
+    끝나면 Tk 메인 스레드에서 on_done(업데이트 여부, 서버 버전) 을 호출합니다.
+    (Tk 는 다른 스레드에서 건드리면 안 되므로 결과는 큐로 받고 root.after 로 확인)
+    제한시간 안에 끝나지 않으면 결과를 버립니다. 작업 스레드도 같은 마감을 받아서
+    마감 뒤에는 요청을 멈추고 파일을 바꾸지 않습니다.
+    """
+    results = queue.Queue()
+    started = time.monotonic()
+
+    def run():
+        with span('startup.update_check') as sp:
+            result = check_and_update(deadline=started + deadline, **kwargs)
+            sp['updated'] = result[0]
+        results.put(result)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+
+    def poll():
+        try:
+            is_updated, new_ver = results.get_nowait()
+        except queue.Empty:
+            if time.monotonic() - started < deadline + RESULT_GRACE:
+                root.after(poll_ms, poll)
+            else:
+                print("⚠️ 업데이트 확인 시간 초과 - 이번 실행에서는 건너뜁니다.")
+            return
+        on_done(is_updated, new_ver)
+
+    root.after(poll_ms, poll)
+    return worker
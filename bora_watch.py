@@ -0,0 +1,153 @@
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from bora_db import PRICE_COLS, source_stamp, fast_db_path, is_fast_db_fresh
+from bora_perf import span
+
+# ===========================================================
+# 👀 [단가표 자동 새로고침]
+# bora_merge.py 가 근무 중에 단가표를 다시 만들면, 계산기를 껐다 켜지 않아도
+# 뒤에서 새 데이터를 불러오고 검색 인덱스까지 만든 다음 한 번에 바꿔 끼웁니다.
+# 시작할 때도 같은 방식으로 최근 조각부터 뒤에서 불러옵니다 (HistoryLoader).
+# (Tk 는 다른 스레드에서 건드리면 안 되므로 결과는 큐로 받고 root.after 로 확인)
+# ===========================================================
+
+WATCH_INTERVAL = 5   # 파일 확인 간격(초)
+EXCEL_GRACE = 60     # 엑셀만 바뀌고 고속 파일(.pkl)이 안 생기면 이만큼(초) 기다린 뒤 엑셀로 읽음
+POLL_MS = 500        # 메인 스레드가 결과를 확인하는 간격(ms)
+HISTORY_POLL_MS = 100 # 시작할 때 조각 불러오기 결과 확인 간격(ms) - 첫 조각이 빨리 보이게
+
+def db_stamp(db_path):
+    # 엑셀 + 고속 파일의 (크기, 수정시각)
+    return source_stamp(db_path), source_stamp(fast_db_path(db_path))
+
+def row_changes(old_df, new_df):
+    """
+    두 단가표를 행 내용(해시)으로 비교해서 (새로 생긴 행 수, 없어진 행 수) 를 돌려줍니다.
+    같은 내용이 여러 줄이면 줄 수까지 비교합니다.
+    """
+    def counts(df):
+        if df.empty: return pd.Series(dtype=np.int64)
+        return pd.util.hash_pandas_object(df[PRICE_COLS], index=False).value_counts()
+    diff = counts(new_df).sub(counts(old_df), fill_value=0)
+    return int(diff[diff > 0].sum()), int(-diff[diff < 0].sum())
+
+class DbWatcher:
+    """
+    loader()          : 작업 스레드에서 실행. 새 데이터를 준비해서 돌려줌 (None 이면 바꿀 것 없음)
+    on_loaded(result) : Tk 메인 스레드에서 호출 (root 가 None 이면 감시 스레드에서 바로 호출 - 화면 없는 서버용)
+    파일이 바뀐 뒤 한 번 더 확인해서 그대로일 때만 (= 병합이 쓰기를 끝낸 뒤) 불러옵니다.
+    """
+
+    def __init__(self, root, db_path, loader, on_loaded, interval=WATCH_INTERVAL, grace=EXCEL_GRACE, poll_ms=POLL_MS):
+        self.root = root
+        self.db_path = db_path
+        self.loader = loader
+        self.on_loaded = on_loaded
+        self.interval = interval
+        self.grace = grace
+        self.poll_ms = poll_ms
+        self.results = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, loaded=None):
+        # 지금 불러온 상태(loaded: 불러오기 시작할 때의 db_stamp)를 기준으로 감시 시작
+        if loaded is None: loaded = db_stamp(self.db_path)
+        self._thread = threading.Thread(target=self._run, args=(loaded,), daemon=True)
+        self._thread.start()
+        if self.root is not None:
+            self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, loaded):
+        pending, since = None, None
+        while not self._stop.wait(self.interval):
+            current = db_stamp(self.db_path)
+            if current == loaded:
+                pending = None
+                continue
+            if current != pending:
+                pending, since = current, time.monotonic() # 아직 쓰는 중일 수 있음 → 다음 확인까지 대기
+                continue
+            if current[0] is None:
+                continue # 엑셀이 잠깐 없음 (교체 중)
+            if not is_fast_db_fresh(self.db_path) and time.monotonic() - since < self.grace:
+                continue # 병합이 고속 파일을 쓰는 중
+            try:
+                with span('reload.total'):
+                    result = self.loader()
+            except Exception as e:
+                print(f"⚠️ 단가표 새로고침 실패: {e}")
+                result = None
+            # 엑셀에서 읽었으면 loader 가 고속 파일을 새로 만들었으므로 다시 기록
+            loaded, pending = db_stamp(self.db_path), None
+            if result is None: continue
+            if self.root is None:
+                self.on_loaded(result)
+            else:
+                self.results.put(result)
+
+    def _poll(self):
+        if self._stop.is_set(): return
+        try:
+            result = self.results.get_nowait()
+        except queue.Empty:
+            result = None
+        if result is not None:
+            self.on_loaded(result)
+        self.root.after(self.poll_ms, self._poll)
+
+class HistoryLoader:
+    """
+    [단계적 시작] 창을 먼저 띄우고 단가표 조각(최근 몇 달 → 이전 연도 순)을 작업 스레드에서 불러옵니다.
+    step(조각정보)        : 작업 스레드에서 조각마다 실행. 조각을 붙인 새 데이터를 만들어 돌려줌
+    on_step(result)       : Tk 메인 스레드에서 조각마다 호출
+    finish()              : 작업 스레드에서 다 불러온 뒤 한 번 실행 (통계 등 전체가 필요한 작업)
+    on_done(result, err)  : Tk 메인 스레드에서 마지막에 호출 (실패하면 err 에 예외)
+    """
+
+    def __init__(self, root, parts, step, on_step, finish, on_done, poll_ms=HISTORY_POLL_MS):
+        self.root = root
+        self.parts = parts
+        self.step = step
+        self.on_step = on_step
+        self.finish = finish
+        self.on_done = on_done
+        self.poll_ms = poll_ms
+        self.results = queue.Queue()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def _run(self):
+        try:
+            with span('startup.history'):
+                for item in self.parts:
+                    self.results.put(('step', self.step(item)))
+                result = self.finish()
+        except Exception as e:
+            self.results.put(('done', None, e))
+            return
+        self.results.put(('done', result, None))
+
+    def _poll(self):
+        while True:
+            try:
+                msg = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if msg[0] == 'done':
+                self.on_done(msg[1], msg[2])
+                return
+            self.on_step(msg[1])
+        self.root.after(self.poll_ms, self._poll)